@@ -0,0 +1,253 @@
+"""Benchmark the decode/resize/encode pipeline.
+
+    python -m benchmarks.bench_pipeline --output results.json
+    python -m benchmarks.bench_pipeline --quick --baseline results.json
+
+Every configuration runs in a fresh process so its peak RSS is its own.
+Results are written as JSON and can be compared against a stored baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import PIL
+from PIL import Image
+
+from imagewebify.engine import (
+    DEFAULT_PRESET,
+    ENCODER_PRESETS,
+    RESIZE_MODES,
+    STAGES,
+    ConversionSettings,
+    convert_batch,
+    convert_file,
+    default_workers,
+)
+
+from .corpus import FULL_SPEC, QUICK_SPEC, generate_corpus
+
+DEFAULT_QUALITIES = (50, 80, 95)
+DEFAULT_MAX_SIZES = (640, 1920)
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "imagewebify-bench-corpus")
+
+# Slowdowns beyond this fraction of the baseline are reported as regressions
+REGRESSION_THRESHOLD = 0.10
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MB"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def time_file_stages(path, settings, output_dir):
+    """Convert one file and return its per-stage timings, pixels and output bytes"""
+    result = convert_file(path, output_dir, settings)
+    if not result.ok:
+        raise RuntimeError(f"benchmark conversion failed for {path}: {result.error}")
+    # No corpus image is a single colour, so a flat output means the pixel
+    # data was lost on the way (e.g. 16-bit values clipped to white)
+    with Image.open(result.output) as img:
+        if all(low == high for low, high in img.getextrema()):
+            raise RuntimeError(f"benchmark output for {path} is a single flat colour")
+    return result.timings, result.input_pixels, result.output_bytes
+
+
+def run_stages(files, settings, repeat):
+    """Per-stage timings over the corpus, best of repeat runs per file"""
+    per_file = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for path in files:
+            best = None
+            for _ in range(repeat):
+                timings, pixels, output_bytes = time_file_stages(path, settings, output_dir)
+                if best is None or sum(timings.values()) < sum(best.values()):
+                    best = timings
+            per_file.append({
+                'file': os.path.basename(path),
+                'pixels': pixels,
+                'output_bytes': output_bytes,
+                'stages': best,
+            })
+    total_seconds = sum(sum(f['stages'].values()) for f in per_file)
+    total_pixels = sum(f['pixels'] for f in per_file)
+    return {
+        'stages': {stage: sum(f['stages'][stage] for f in per_file) for stage in STAGES},
+        'seconds': total_seconds,
+        'images_per_sec': len(per_file) / total_seconds,
+        'mp_per_sec': total_pixels / 1e6 / total_seconds,
+        'output_bytes': sum(f['output_bytes'] for f in per_file),
+        'files': per_file,
+    }
+
+
+def run_batch(files, settings, workers, repeat):
+    """End-to-end throughput of convert_batch with a given worker count"""
+    pixels = 0
+    for path in files:
+        with Image.open(path) as img:
+            pixels += img.width * img.height
+    best = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as output_dir:
+            start = time.perf_counter()
+            summary = convert_batch(files, output_dir, settings, workers=workers)
+            seconds = time.perf_counter() - start
+        if summary.failed:
+            raise RuntimeError(f"benchmark conversion failed: {summary.failed[0].error}")
+        best = seconds if best is None else min(best, seconds)
+    return {
+        'seconds': best,
+        'images_per_sec': len(files) / best,
+        'mp_per_sec': pixels / 1e6 / best,
+    }
+
+
+def run_config(config):
+    """Run one benchmark configuration in this process and return its result"""
+    settings = ConversionSettings(
+        quality=config['quality'],
+        max_size=config['max_size'],
+        resize_mode=config['resize_mode'],
+        preset=config.get('preset', DEFAULT_PRESET),
+    )
+    if config['type'] == 'stages':
+        result = run_stages(config['files'], settings, config['repeat'])
+    else:
+        result = run_batch(config['files'], settings, config['workers'], config['repeat'])
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def config_name(config):
+    name = f"{config['type']} q{config['quality']} s{config['max_size']} {config['resize_mode']}"
+    if config['type'] == 'batch':
+        name += f" j{config['workers']}"
+    # The default preset is left out so older baselines still match by name
+    if config.get('preset', DEFAULT_PRESET) != DEFAULT_PRESET:
+        name += f" {config['preset']}"
+    return name
+
+
+def build_configs(files, args):
+    """Stage and batch runs cover the same quality/size/mode/preset matrix;
+    batch runs are repeated for every worker count"""
+    matrix = [{'quality': quality, 'max_size': max_size, 'resize_mode': resize_mode, 'preset': preset}
+              for quality in args.quality
+              for max_size in args.max_size
+              for resize_mode in args.resize_mode
+              for preset in args.preset]
+    configs = [dict(settings, type='stages') for settings in matrix]
+    for workers in args.workers:
+        configs.extend(dict(settings, type='batch', workers=workers) for settings in matrix)
+    for config in configs:
+        config['files'] = files
+        config['repeat'] = args.repeat
+    return configs
+
+
+def run_isolated(config):
+    """Run a configuration in a fresh interpreter so peak RSS is measured per config"""
+    proc = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_pipeline', '--run-config', json.dumps(config)],
+        stdout=subprocess.PIPE, check=True, universal_newlines=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print throughput relative to a baseline and return the regressed names"""
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(result['name'])
+        if not old:
+            continue
+        ratio = result['images_per_sec'] / old['images_per_sec']
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  REGRESSION"
+            regressions.append(result['name'])
+        print(f"{result['name']:<40} {ratio:6.2f}x baseline{flag}")
+    return regressions
+
+
+def parse_list(value, cast=int):
+    return [cast(v) for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ImageWebify conversion pipeline.")
+    parser.add_argument("--quick", action="store_true", help="small corpus (images up to 2000px)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="folder for the generated corpus")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--quality", type=parse_list, default=list(DEFAULT_QUALITIES))
+    parser.add_argument("--max-size", type=parse_list, default=list(DEFAULT_MAX_SIZES))
+    parser.add_argument("--resize-mode", type=lambda v: parse_list(v, str), default=list(RESIZE_MODES))
+    parser.add_argument("--preset", type=lambda v: parse_list(v, str), default=[DEFAULT_PRESET],
+                        help=f"comma separated encoder presets of {', '.join(ENCODER_PRESETS)}")
+    parser.add_argument("--workers", type=parse_list, default=sorted({1, default_workers()}))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per configuration, best is kept")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous results JSON file")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit with status 1 if any configuration regressed")
+    parser.add_argument("--run-config", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_config:
+        print(json.dumps(run_config(json.loads(args.run_config))))
+        return 0
+
+    spec = QUICK_SPEC if args.quick else FULL_SPEC
+    files = generate_corpus(args.corpus, spec, args.seed)
+
+    results = []
+    for config in build_configs(files, args):
+        name = config_name(config)
+        result = run_isolated(config)
+        result['name'] = name
+        results.append(result)
+        rss = result['peak_rss_mb']
+        print(f"{name:<40} {result['images_per_sec']:7.2f} img/s {result['mp_per_sec']:8.2f} MP/s"
+              + (f" {rss:7.1f} MB peak" if rss is not None else ""))
+        if 'stages' in result:
+            print("    " + "  ".join(f"{stage} {result['stages'][stage]:.3f}s" for stage in STAGES))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'corpus': [f"{kind}-{side}" for kind, side in spec],
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f))
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Benchmark the local HTTP conversion service.
+
+    python -m benchmarks.bench_server --quick --clients 4 --requests 200
+
+Starts a ConversionServer on a free localhost port, posts corpus images
+from concurrent client threads and reports throughput, latency percentiles
+and how many requests were rejected because the queue was full.
+"""
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+
+from imagewebify.engine import DEFAULT_PRESET, ENCODER_PRESETS, default_workers
+from imagewebify.server import HOST, PERCENTILES, ConversionServer, percentile
+
+from .bench_pipeline import DEFAULT_CORPUS_DIR
+from .corpus import FULL_SPEC, QUICK_SPEC, generate_corpus
+
+
+def client(port, bodies, query, count, latencies, statuses, lock):
+    """Post count requests over one keep-alive connection"""
+    conn = http.client.HTTPConnection(HOST, port)
+    for i in range(count):
+        body = bodies[i % len(bodies)]
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/convert?' + query, body)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (ConnectionError, http.client.HTTPException):
+            status = 'connection error'
+            response = None
+        seconds = time.perf_counter() - start
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(seconds)
+        if response is None or response.will_close:
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, port)
+    conn.close()
+
+
+def run(bodies, query, clients, requests, workers, queue_size):
+    server = ConversionServer(0, workers, queue_size)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    per_client = [requests // clients + (1 if i < requests % clients else 0) for i in range(clients)]
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(server.server_port, bodies, query, count,
+                                                         latencies, statuses, lock))
+                   for count in per_client]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        seconds = time.perf_counter() - start
+        metrics = server.metrics()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    latencies.sort()
+    result = {
+        'seconds': seconds,
+        'requests_per_sec': statuses.get(200, 0) / seconds,
+        'statuses': statuses,
+        'latency_ms': {f"p{pct}": round(percentile(latencies, pct) * 1000, 3) if latencies else None
+                       for pct in PERCENTILES},
+        'server': metrics,
+    }
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ImageWebify HTTP conversion service.")
+    parser.add_argument("--quick", action="store_true", help="small corpus (images up to 2000px)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="folder for the generated corpus")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--clients", type=int, default=4, help="concurrent client connections")
+    parser.add_argument("--requests", type=int, default=100, help="total requests to send")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="server worker processes")
+    parser.add_argument("--queue-size", type=int, default=None, help="server queue limit")
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--max-size", type=int, default=640)
+    parser.add_argument("--preset", choices=list(ENCODER_PRESETS), default=DEFAULT_PRESET)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    files = generate_corpus(args.corpus, QUICK_SPEC if args.quick else FULL_SPEC, args.seed)
+    bodies = []
+    for path in files:
+        with open(path, 'rb') as f:
+            bodies.append(f.read())
+    query = f"quality={args.quality}&max_size={args.max_size}&preset={args.preset}"
+
+    result = run(bodies, query, args.clients, args.requests, args.workers, args.queue_size)
+    latency = result['latency_ms']
+    print(f"{result['requests_per_sec']:.2f} req/s over {result['seconds']:.2f}s, "
+          + " ".join(f"{name} {value}ms" for name, value in latency.items()))
+    print("Statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(result['statuses'].items(), key=str)))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
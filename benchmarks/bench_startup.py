@@ -0,0 +1,121 @@
+"""Benchmark startup: import time and first-conversion latency in a fresh process.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 20 --fail-over-budget
+
+Short-lived scripted invocations pay interpreter start, imports and the
+first encode every time, so these are measured in new interpreters and
+compared against a budget. Each run also checks that no GUI module was
+imported on the conversion path.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Medians above these (in milliseconds) fail --fail-over-budget. Measured
+# on a single-core Linux VM at about 60% of each.
+BUDGETS_MS = {
+    'import': 110,
+    'first_conversion': 50,
+    'cli_process': 300,
+}
+# Modules that must never be imported by the conversion path
+GUI_MODULES = ('tkinter', 'PIL.ImageTk', 'imagewebify.gui')
+# The corpus image converted by the first-conversion probe, and its output
+# size, kept small so fixed costs dominate rather than pixel work
+PROBE_SPEC = [('photo', 500)]
+PROBE_MAX_SIZE = 320
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "imagewebify-bench-startup")
+
+
+def probe(path, output_dir):
+    """Time the engine import and one conversion in this (fresh) process"""
+    start = time.perf_counter()
+    from imagewebify.engine import ConversionSettings, convert_file
+    imported = time.perf_counter()
+    result = convert_file(path, output_dir, ConversionSettings(max_size=PROBE_MAX_SIZE))
+    converted = time.perf_counter()
+    if not result.ok:
+        raise RuntimeError(f"probe conversion failed: {result.error}")
+    return {
+        'import': (imported - start) * 1000,
+        'first_conversion': (converted - imported) * 1000,
+        'gui_modules': [name for name in GUI_MODULES if name in sys.modules],
+        'pil_plugins': sorted(name for name in sys.modules if name.endswith('ImagePlugin')),
+    }
+
+
+def run_probe(path, output_dir):
+    proc = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_startup', '--probe', path, output_dir],
+        stdout=subprocess.PIPE, check=True, universal_newlines=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def run_cli(path, output_dir):
+    """Wall time of a whole `python -m imagewebify` invocation, in milliseconds"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'imagewebify', path, '-o', output_dir, '-j', '1',
+                    '-s', str(PROBE_MAX_SIZE)],
+                   stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ImageWebify import and first-conversion latency.")
+    parser.add_argument("--runs", type=int, default=10, help="fresh processes per measurement, median is kept")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="folder for the probe image")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--fail-over-budget", action="store_true",
+                        help="exit with status 1 if a median exceeds its budget or a GUI module was imported")
+    parser.add_argument("--probe", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(*args.probe)))
+        return 0
+
+    # Imported here so probes start without Pillow already loaded
+    from .corpus import generate_corpus
+    path = generate_corpus(args.corpus, PROBE_SPEC, 0)[0]
+    samples = {name: [] for name in BUDGETS_MS}
+    gui_modules = set()
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(args.runs):
+            result = run_probe(path, output_dir)
+            samples['import'].append(result['import'])
+            samples['first_conversion'].append(result['first_conversion'])
+            gui_modules.update(result['gui_modules'])
+            samples['cli_process'].append(run_cli(path, output_dir))
+
+    over_budget = []
+    medians = {}
+    for name, values in samples.items():
+        medians[name] = statistics.median(values)
+        flag = ""
+        if medians[name] > BUDGETS_MS[name]:
+            flag = "  OVER BUDGET"
+            over_budget.append(name)
+        print(f"{name:<18} median {medians[name]:7.1f} ms  max {max(values):7.1f} ms  "
+              f"budget {BUDGETS_MS[name]} ms{flag}")
+    print(f"Pillow plugins loaded: {len(result['pil_plugins'])} ({', '.join(result['pil_plugins'])})")
+    if gui_modules:
+        print(f"GUI modules imported on the conversion path: {', '.join(sorted(gui_modules))}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'medians_ms': medians, 'budgets_ms': BUDGETS_MS, 'samples_ms': samples,
+                       'gui_modules': sorted(gui_modules), 'pil_plugins': result['pil_plugins']}, f, indent=2)
+    if (over_budget or gui_modules) and args.fail_over_budget:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
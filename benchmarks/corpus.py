@@ -0,0 +1,97 @@
+"""Deterministic synthetic image corpus for the benchmarks"""
+import os
+import random
+
+from PIL import Image, ImageDraw
+
+# (kind, longest side) of every corpus image
+FULL_SPEC = [
+    ('photo', 500), ('photo', 2000), ('photo', 4000), ('photo', 8000),
+    ('flat', 500), ('flat', 2000), ('flat', 8000),
+    ('rgba', 500), ('rgba', 2000), ('rgba', 4000),
+    ('palette', 500), ('palette', 2000), ('palette', 4000),
+    ('gray', 500), ('gray', 2000), ('gray16', 500), ('gray16', 2000),
+]
+QUICK_SPEC = [spec for spec in FULL_SPEC if spec[1] <= 2000]
+
+EXTENSIONS = {'photo': 'jpg', 'flat': 'png', 'rgba': 'png', 'palette': 'png',
+              'gray': 'jpg', 'gray16': 'png'}
+# Kinds saved as JPEG, the rest are PNG
+JPEG_KINDS = ('photo', 'gray')
+
+
+def random_bytes(rng, count):
+    return rng.getrandbits(count * 8).to_bytes(count, 'little') if count else b''
+
+
+def photo_like(size, rng):
+    """Smooth colour regions plus fine grain, roughly like a camera photo"""
+    width, height = size
+    blob_size = (max(2, width // 48), max(2, height // 48))
+    blobs = Image.frombytes('RGB', blob_size, random_bytes(rng, blob_size[0] * blob_size[1] * 3))
+    img = blobs.resize(size, Image.BICUBIC)
+
+    grain_size = (max(1, width // 2), max(1, height // 2))
+    grain = Image.frombytes('L', grain_size, random_bytes(rng, grain_size[0] * grain_size[1]))
+    grain = grain.resize(size, Image.BILINEAR)
+    return Image.blend(img, Image.merge('RGB', (grain, grain, grain)), 0.15)
+
+
+def flat_like(size, rng):
+    """Flat colour panels and text-like strokes, roughly like a screenshot"""
+    img = Image.new('RGB', size, (245, 245, 245))
+    draw = ImageDraw.Draw(img)
+    width, height = size
+    for _ in range(24):
+        left, top = rng.randrange(width), rng.randrange(height)
+        right, bottom = left + rng.randrange(width // 2 + 1), top + rng.randrange(height // 2 + 1)
+        draw.rectangle((left, top, right, bottom), fill=tuple(rng.randrange(256) for _ in range(3)))
+    line_height = max(4, height // 120)
+    for y in range(line_height, height, line_height * 2):
+        x = rng.randrange(line_height * 4)
+        while x < width * 0.9:
+            word = rng.randrange(line_height, line_height * 6)
+            draw.rectangle((x, y, x + word, y + line_height // 2), fill=(40, 40, 40))
+            x += word + line_height
+    return img
+
+
+def make_image(kind, side, seed):
+    rng = random.Random(f"{kind}-{side}-{seed}")
+    size = (side, side * 2 // 3)
+    if kind == 'photo':
+        return photo_like(size, rng)
+    if kind == 'flat':
+        return flat_like(size, rng)
+    if kind == 'rgba':
+        img = photo_like(size, rng).convert('RGBA')
+        mask = Image.new('L', size, 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, size[0] - 1, size[1] - 1), fill=255)
+        img.putalpha(mask)
+        return img
+    if kind == 'palette':
+        return flat_like(size, rng).convert('P', palette=Image.ADAPTIVE, colors=64)
+    if kind == 'gray':
+        return photo_like(size, rng).convert('L')
+    if kind == 'gray16':
+        # 16-bit grayscale PNG, as written by scanners and scientific tools
+        return photo_like(size, rng).convert('L').point(lambda v: v * 257, 'I').convert('I;16')
+    raise ValueError(f"unknown corpus image kind: {kind}")
+
+
+def generate_corpus(folder, spec=FULL_SPEC, seed=0):
+    """Write the corpus to folder (reusing existing files) and return their paths"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for kind, side in spec:
+        path = os.path.join(folder, f"{kind}-{side}-s{seed}.{EXTENSIONS[kind]}")
+        if not os.path.exists(path):
+            img = make_image(kind, side, seed)
+            tmp_path = path + ".tmp"
+            if kind in JPEG_KINDS:
+                img.save(tmp_path, 'JPEG', quality=90)
+            else:
+                img.save(tmp_path, 'PNG')
+            os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,37 @@
+"""ImageWebify - batch JPG/PNG to WebP conversion"""
+from .engine import (
+    SUPPORTED_EXTENSIONS,
+    BatchSummary,
+    ConversionResult,
+    ConversionSettings,
+    convert_batch,
+    convert_file,
+    resize_image,
+    resume_batch,
+)
+from .metadata import ImageInfo, MetadataIndex
+
+__version__ = "0.0.1"
+
+__all__ = [
+    "SUPPORTED_EXTENSIONS",
+    "BatchSummary",
+    "ConversionResult",
+    "ConversionSettings",
+    "ImageInfo",
+    "MetadataIndex",
+    "convert_archive",
+    "convert_batch",
+    "convert_file",
+    "resize_image",
+    "resume_batch",
+]
+
+
+def __getattr__(name):
+    # Imported on first use, so that conversions without archives (and every
+    # worker process) do not load zipfile, tarfile and their codecs
+    if name == "convert_archive":
+        from .archive import convert_archive
+        return convert_archive
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
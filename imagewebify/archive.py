@@ -0,0 +1,240 @@
+"""Converting images streamed out of ZIP/TAR archives, optionally into an archive"""
+import io
+import os
+import posixpath
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future
+
+from .dedup import suffixed_stem
+from .engine import (
+    SUBMIT_WINDOW,
+    BatchSummary,
+    ConversionResult,
+    ConversionSettings,
+    convert_bytes,
+    default_workers,
+    is_supported,
+    process_pool,
+    write_output,
+)
+from .filelist import archive_type, is_archive
+
+# Tar compression for each output extension (see filelist.ARCHIVE_EXTENSIONS);
+# ZIP entries are stored uncompressed because WebP data does not deflate any further
+TAR_MODES = {
+    '.tar': 'w',
+    '.tar.gz': 'w:gz', '.tgz': 'w:gz',
+    '.tar.bz2': 'w:bz2', '.tbz2': 'w:bz2',
+    '.tar.xz': 'w:xz', '.txz': 'w:xz',
+}
+# Errors reading a damaged or unreadable archive
+ARCHIVE_ERRORS = (OSError, zipfile.BadZipFile, tarfile.TarError)
+
+# The earliest timestamp a ZIP entry can carry
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def entry_name(name):
+    """Turn an archive member name into a safe relative POSIX path, or None.
+
+    Absolute paths, drive letters and '..' components are dropped so that
+    no entry can be written outside the output folder.
+    """
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+    if parts and parts[0].endswith(':'):
+        parts = parts[1:]
+    return '/'.join(parts) or None
+
+
+def count_entries(inputs):
+    """Number of images in inputs, or None if a compressed tar would have to be read for it"""
+    total = 0
+    for path in inputs:
+        if archive_type(path) == '.zip':
+            with zipfile.ZipFile(path) as zf:
+                total += sum(1 for info in zf.infolist() if not info.is_dir() and is_supported(info.filename))
+        elif is_archive(path):
+            return None
+        else:
+            total += 1
+    return total
+
+
+def iter_entries(inputs):
+    """Yield (source, name, mtime, read) for every image in inputs.
+
+    Archives are read member by member, tar files as a stream, so read()
+    must be called before the next entry is requested. Plain image files
+    are entries named after their file name.
+    """
+    for path in inputs:
+        kind = archive_type(path)
+        if kind == '.zip':
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    name = entry_name(info.filename)
+                    if info.is_dir() or not name or not is_supported(name):
+                        continue
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    yield os.path.join(path, name), name, mtime, lambda info=info: zf.read(info)
+        elif kind:
+            with tarfile.open(path, 'r|*') as tf:
+                for member in tf:
+                    name = entry_name(member.name)
+                    if not member.isfile() or not name or not is_supported(name):
+                        continue
+                    yield (os.path.join(path, name), name, member.mtime,
+                           lambda member=member: tf.extractfile(member).read())
+        else:
+            def read(path=path):
+                with open(path, 'rb') as f:
+                    return f.read()
+            yield path, os.path.basename(path), os.path.getmtime(path), read
+
+
+class FolderWriter:
+    """Writes entries as files below a folder"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+
+    def write(self, name, data, mtime):
+        path = os.path.join(self.output_dir, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_output(path, data)
+        return path
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+class ArchiveWriter:
+    """Writes entries into a ZIP or TAR archive.
+
+    The archive is built at a temporary path next to output and only renamed
+    into place by close(), so an interrupted run never leaves a truncated
+    archive behind.
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.tmp_path = output + ".tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        kind = archive_type(output)
+        if kind == '.zip':
+            self._zip = zipfile.ZipFile(self.tmp_path, 'w', zipfile.ZIP_STORED)
+            self._tar = None
+        else:
+            self._zip = None
+            self._tar = tarfile.open(self.tmp_path, TAR_MODES[kind])
+
+    def write(self, name, data, mtime):
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=max(time.localtime(mtime)[:6], ZIP_EPOCH))
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(mtime)
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+        return os.path.join(self.output, name)
+
+    def _close_archive(self):
+        (self._zip or self._tar).close()
+
+    def close(self):
+        self._close_archive()
+        os.replace(self.tmp_path, self.output)
+
+    def abort(self):
+        self._close_archive()
+        os.unlink(self.tmp_path)
+
+
+def output_name(name, source, used):
+    """name with a .webp extension, made unique among the names already used"""
+    stem = posixpath.splitext(name)[0]
+    webp_name = stem + ".webp"
+    if webp_name.lower() in used:
+        webp_name = suffixed_stem(stem, source) + ".webp"
+    used.add(webp_name.lower())
+    return webp_name
+
+
+def convert_archive(inputs, output, settings=None, workers=None, progress=None, cancel=None):
+    """Convert the images in archives (and plain image files) to WebP.
+
+    inputs are ZIP/TAR archives, compressed tars included, or image files;
+    output is a ZIP/TAR archive (by its extension) or a folder. Entries are
+    read straight from the archives and converted in memory, and the WebP
+    data goes straight into output, keeping the input order and folder
+    structure with a .webp extension. Settings.widths is not supported.
+
+    Only SUBMIT_WINDOW entries per worker are held at a time, read but not
+    yet written, so memory stays bounded however large the archives are.
+
+    progress and cancel work as in engine.convert_batch; progress gets a
+    total of 0 when it is unknown (compressed tars are read only once). A
+    cancelled batch still produces a valid output with the entries done.
+    """
+    settings = settings or ConversionSettings()
+    workers = workers or default_workers()
+    summary = BatchSummary()
+    started = time.perf_counter()
+    total = count_entries(inputs) or 0
+    writer = ArchiveWriter(output) if is_archive(output) else FolderWriter(output)
+    used = set()
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    def record(source, name, mtime, outcome):
+        webp, result = outcome.result() if isinstance(outcome, Future) else outcome
+        result.source = source
+        if result.ok:
+            write_started = time.perf_counter()
+            result.output = writer.write(output_name(name, source, used), webp, mtime)
+            result.timings['write'] = time.perf_counter() - write_started
+        summary.results.append(result)
+        if progress:
+            progress(result, len(summary.results), total)
+
+    pool = process_pool(workers) if workers > 1 else None
+    completed = False
+    try:
+        # Entries in input order, each with a Future or a finished
+        # (webp, result); the oldest is written once the window is full
+        window = deque()
+        for source, name, mtime, read in iter_entries(inputs):
+            if cancelled():
+                summary.cancelled = True
+                break
+            try:
+                data = read()
+            except Exception as e:
+                outcome = (None, ConversionResult(source, error=str(e)))
+            else:
+                outcome = pool.submit(convert_bytes, data, settings) if pool else convert_bytes(data, settings)
+            window.append((source, name, mtime, outcome))
+            while len(window) >= (SUBMIT_WINDOW * workers if pool else 1):
+                record(*window.popleft())
+        while window:
+            record(*window.popleft())
+        completed = True
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        summary.wall_seconds = time.perf_counter() - started
+        if completed:
+            writer.close()
+        else:
+            writer.abort()
+    return summary
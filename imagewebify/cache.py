@@ -0,0 +1,58 @@
+"""Small thread-safe caches shared by the background helpers"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping, safe to use from several threads.
+
+    The bound is a number of entries, a byte budget, or both. With max_bytes,
+    sizeof(value) gives each entry's cost; a single value larger than the
+    whole budget is not cached at all.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.total_bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._data.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.total_bytes += size
+            while self._over_budget():
+                self.total_bytes -= self._data.popitem(last=False)[1][1]
+
+    def _over_budget(self):
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.total_bytes > self.max_bytes
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
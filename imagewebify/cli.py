@@ -0,0 +1,299 @@
+"""Headless command line interface: python -m imagewebify"""
+import argparse
+import os
+import sys
+
+from .engine import (
+    DEFAULT_MAX_SIZE,
+    DEFAULT_MAX_TUNE_SECONDS,
+    DEFAULT_PRESET,
+    DEFAULT_QUALITY,
+    DEFAULT_RESIZE_MODE,
+    ENCODER_PRESETS,
+    RESIZE_MODES,
+    ConversionSettings,
+    convert_batch,
+    default_workers,
+    parse_widths,
+    resume_batch,
+)
+from .journal import Journal
+from .filelist import is_archive, scan_folder
+from .profiling import PROFILERS, make_profiler
+from .report import ReportWriter, format_summary, summarize
+from .tune import parse_size, tuning_enabled
+
+
+def collect_files(inputs):
+    """Expand the given paths into a list of supported image files"""
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(scan_folder(path, recursive=False))
+        else:
+            files.append(path)
+    return files
+
+
+def widths_argument(value):
+    try:
+        widths = parse_widths(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    if not widths:
+        raise argparse.ArgumentTypeError("at least one width is needed")
+    return widths
+
+
+def size_argument(value):
+    try:
+        size = parse_size(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("size must be a number of bytes, optionally with KB, MB or GB") from None
+    if size < 1:
+        raise argparse.ArgumentTypeError("size must be positive")
+    return size
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="imagewebify",
+        description="Batch convert JPG/PNG images to WebP.",
+    )
+    parser.add_argument("inputs", nargs="*",
+                        help="image files, folders containing images, or ZIP/TAR archives of images")
+    parser.add_argument("-o", "--output",
+                        help="output folder, or a .zip/.tar(.gz/.bz2/.xz) archive to write "
+                             "(default: folder of the first input)")
+    parser.add_argument("-q", "--quality", type=int, default=DEFAULT_QUALITY,
+                        help=f"WebP quality 1-100 (default: {DEFAULT_QUALITY})")
+    parser.add_argument("-s", "--max-size", type=int, default=DEFAULT_MAX_SIZE,
+                        help=f"longest side in pixels (default: {DEFAULT_MAX_SIZE})")
+    parser.add_argument("-m", "--resize-mode", choices=RESIZE_MODES, default=DEFAULT_RESIZE_MODE,
+                        help="'quality' resizes from the full decode, 'fast' shrinks JPEGs "
+                             f"while decoding (default: {DEFAULT_RESIZE_MODE})")
+    parser.add_argument("-p", "--preset", choices=list(ENCODER_PRESETS), default=DEFAULT_PRESET,
+                        help="encoder speed/size trade-off; flat and palette images are also tried "
+                             f"lossless except with 'lossless', which always is (default: {DEFAULT_PRESET})")
+    parser.add_argument("--widths", type=widths_argument, default=(),
+                        help="comma separated output widths for responsive images, e.g. 320,640,1280 "
+                             "(writes name-640w.webp etc. from a single decode; overrides --max-size)")
+    parser.add_argument("--srcset-manifest", action="store_true",
+                        help="with --widths, write srcset.json and srcset.html to the output folder")
+    tuning = parser.add_argument_group("quality auto-tuning")
+    tuning.add_argument("--target-size", type=size_argument, default=0, metavar="SIZE",
+                        help="pick the highest quality whose output fits SIZE (e.g. 150KB)")
+    tuning.add_argument("--min-ssim", type=float, default=0.0,
+                        help="pick the lowest quality whose output reaches this SSIM (0-1)")
+    tuning.add_argument("--min-psnr", type=float, default=0.0,
+                        help="pick the lowest quality whose output reaches this PSNR in dB")
+    tuning.add_argument("--max-tune-seconds", type=float, default=DEFAULT_MAX_TUNE_SECONDS,
+                        help=f"encode time allowed per image for the search, all widths together "
+                             f"(default: {DEFAULT_MAX_TUNE_SECONDS:g})")
+    parser.add_argument("-i", "--incremental", action="store_true",
+                        help="skip files already converted with the same settings")
+    parser.add_argument("--hash", action="store_true",
+                        help="with --incremental, also match unchanged files by content hash")
+    parser.add_argument("--dedup", action="store_true",
+                        help="convert files with identical contents once and link or copy the output")
+    parser.add_argument("--resume", metavar="FOLDER",
+                        help="continue the interrupted conversion into FOLDER with its original "
+                             "inputs and settings, converting only the unfinished images")
+    parser.add_argument("-w", "--watch", action="store_true",
+                        help="keep running and convert images as they arrive in the input folder")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="with --watch, ignore images already in the folder at startup")
+    parser.add_argument("--report", metavar="PATH",
+                        help="write a JSON Lines report with per-file stage timings and sizes")
+    parser.add_argument("--profile", choices=sorted(PROFILERS),
+                        help="profile the run in a single process with cProfile or tracemalloc")
+    parser.add_argument("--profile-output", metavar="PATH", help="where to write the profile")
+    parser.add_argument("-j", "--workers", type=int, default=default_workers(),
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--memory-budget", type=size_argument, default=0, metavar="SIZE",
+                        help="only start images while their estimated memory fits SIZE (e.g. 4GB)")
+    service = parser.add_argument_group("conversion service")
+    service.add_argument("--serve", action="store_true",
+                         help="run a local HTTP service converting POSTed images (see README)")
+    service.add_argument("--port", type=int, default=None,
+                         help="port to listen on at 127.0.0.1 (default: 8765)")
+    service.add_argument("--queue-size", type=int, default=None,
+                         help="requests allowed to wait for a worker before new ones get 503 "
+                              "(default: 4 per worker)")
+    return parser
+
+
+def settings_from_args(args):
+    return ConversionSettings(
+        quality=args.quality,
+        max_size=args.max_size,
+        resize_mode=args.resize_mode,
+        preset=args.preset,
+        widths=args.widths,
+        target_bytes=args.target_size,
+        min_ssim=args.min_ssim,
+        min_psnr=args.min_psnr,
+        max_tune_seconds=args.max_tune_seconds,
+    )
+
+
+def run_watch(parser, args):
+    # Imported per mode so a plain batch run does not load inotify bindings,
+    # a process pool or http.server
+    from .watch import FolderWatcher
+
+    if len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+        parser.error("--watch needs exactly one folder to watch")
+    folder = args.inputs[0]
+
+    def report(result):
+        name = os.path.basename(result.source)
+        if result.ok:
+            print(f"Converted: {name}", flush=True)
+        else:
+            print(f"Failed: {name}: {result.error}", file=sys.stderr, flush=True)
+
+    watcher = FolderWatcher(
+        folder, args.output or folder, settings_from_args(args), workers=args.workers,
+        process_existing=not args.skip_existing, on_result=report,
+    )
+    print(f"Watching {folder} ({watcher.backend_name}), press Ctrl+C to stop", flush=True)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+
+def check_archive_args(parser, args):
+    unsupported = [flag for flag, value in (
+        ("--widths", args.widths), ("--incremental", args.incremental), ("--hash", args.hash),
+        ("--dedup", args.dedup),
+        ("--memory-budget", args.memory_budget), ("--profile", args.profile),
+    ) if value]
+    if unsupported:
+        parser.error(f"{', '.join(unsupported)} cannot be used with archives")
+    if not args.output:
+        parser.error("archives need an output folder or archive (-o)")
+
+
+def run_server(parser, args):
+    from .server import DEFAULT_PORT, HOST, serve
+
+    if args.inputs:
+        parser.error("--serve takes no input files")
+    if args.queue_size is not None and args.queue_size < 0:
+        parser.error("queue size cannot be negative")
+
+    def ready(server):
+        print(f"Serving on http://{HOST}:{server.server_port} with {server.workers} warm workers, "
+              "press Ctrl+C to stop", flush=True)
+
+    try:
+        serve(DEFAULT_PORT if args.port is None else args.port, args.workers, args.queue_size, ready=ready)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.quality <= 100:
+        parser.error("quality must be between 1 and 100")
+    if args.max_size < 1:
+        parser.error("max size must be a positive number of pixels")
+    if args.workers < 1:
+        parser.error("workers must be at least 1")
+    if args.target_size and (args.min_ssim or args.min_psnr):
+        parser.error("--target-size cannot be combined with --min-ssim/--min-psnr")
+
+    if args.serve:
+        return run_server(parser, args)
+    archive_mode = any(is_archive(path) for path in args.inputs) or is_archive(args.output or "")
+    if args.resume:
+        if args.inputs:
+            parser.error("--resume takes no input files; they are read from the journal")
+        journal = Journal(args.resume)
+        if not journal.files:
+            parser.error(f"no interrupted conversion found in {args.resume}")
+        print(f"Resuming: {len(journal.unfinished())} of {len(journal.files)} images left", flush=True)
+        output_dir = args.resume
+    elif not args.inputs:
+        parser.error("the following arguments are required: inputs")
+    elif args.watch:
+        return run_watch(parser, args)
+    elif archive_mode:
+        # Only archive runs pay for importing zipfile, tarfile and their codecs
+        from .archive import ARCHIVE_ERRORS, convert_archive
+
+        check_archive_args(parser, args)
+        files = collect_files(args.inputs)
+        output_dir = args.output
+    else:
+        files = collect_files(args.inputs)
+        if not files:
+            parser.error("no JPG/PNG images found in the given inputs")
+
+        output_dir = args.output
+        if not output_dir:
+            first = args.inputs[0]
+            output_dir = first if os.path.isdir(first) else os.path.dirname(os.path.abspath(first))
+
+    settings = settings_from_args(args)
+
+    report_writer = ReportWriter(args.report) if args.report else None
+    profiler = make_profiler(args.profile, args.profile_output) if args.profile else None
+
+    def report(result, done, total):
+        if report_writer:
+            report_writer.write(result)
+        # Archive entries are named with their path inside the archive
+        name = result.source if archive_mode else os.path.basename(result.source)
+        # The total is 0 while a compressed tar has not been read to the end
+        count = f"[{done}/{total}]" if total else f"[{done}]"
+        if result.resumed:
+            print(f"{count} Already done: {name}")
+        elif result.skipped:
+            print(f"{count} Skipped (unchanged): {name}")
+        elif result.ok and result.duplicate_of:
+            print(f"{count} Duplicate of {os.path.basename(result.duplicate_of)} ({result.shared_by}): {name}")
+        elif result.ok:
+            detail = ""
+            if tuning_enabled(settings):
+                detail = f" (quality {result.quality_used}, {result.encode_iterations} encodes)"
+            print(f"{count} Converted: {name}{detail}")
+        else:
+            print(f"{count} Failed: {name}: {result.error}", file=sys.stderr)
+
+    try:
+        if args.resume:
+            summary = resume_batch(output_dir, workers=args.workers, progress=report, profiler=profiler)
+        elif archive_mode:
+            try:
+                summary = convert_archive(files, output_dir, settings, workers=args.workers, progress=report)
+            except ARCHIVE_ERRORS as e:
+                print(f"imagewebify: {e}", file=sys.stderr)
+                return 1
+        else:
+            summary = convert_batch(
+                files, output_dir, settings, workers=args.workers, progress=report,
+                incremental=args.incremental, content_hash=args.hash, profiler=profiler,
+                srcset_manifest=args.srcset_manifest, memory_budget=args.memory_budget,
+                dedup=args.dedup, journal=True,
+            )
+    except KeyboardInterrupt:
+        if archive_mode:
+            print("\nInterrupted.", file=sys.stderr)
+        else:
+            print(f"\nInterrupted. Continue with: python -m imagewebify --resume {output_dir}", file=sys.stderr)
+        return 130
+    finally:
+        if report_writer:
+            report_writer.close()
+
+    print(format_summary(summarize(summary), basename=os.path.basename))
+    if profiler:
+        print(f"Profile written to {profiler.output_path}")
+    return 1 if summary.failed else 0
@@ -0,0 +1,120 @@
+"""Encoding identical sources once and sharing the output between their copies"""
+import errno
+import hashlib
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .manifest import file_hash
+
+# Threads hashing sources; hashlib releases the GIL on large reads
+HASH_WORKERS = 8
+# Length of the path hash appended to colliding output names
+STEM_HASH_LENGTH = 8
+
+# Linux ioctl cloning a whole file on copy-on-write filesystems (btrfs, XFS)
+FICLONE = 0x40049409
+
+
+def suffixed_stem(stem, path):
+    """stem plus '-' and a short hash of path, for a source whose plain stem is taken"""
+    digest = hashlib.sha1(path.encode('utf-8', 'surrogateescape')).hexdigest()
+    return f"{stem}-{digest[:STEM_HASH_LENGTH]}"
+
+
+def unique_stems(files):
+    """Map each file to a collision-free output stem.
+
+    Sources sharing a stem (case-insensitively, as on Windows and macOS)
+    would overwrite each other's output. Of each such group the path that
+    sorts first keeps the plain stem and the others get '-' plus a short
+    hash of their absolute path, so names do not depend on the file order.
+    """
+    groups = {}
+    for path in files:
+        groups.setdefault(Path(path).stem.lower(), set()).add(os.path.abspath(path))
+    stems = {}
+    for path in files:
+        stem = Path(path).stem
+        absolute = os.path.abspath(path)
+        group = groups[stem.lower()]
+        if len(group) > 1 and absolute != min(group):
+            stem = suffixed_stem(stem, absolute)
+        stems[path] = stem
+    return stems
+
+
+def _hash_or_none(path):
+    try:
+        return file_hash(path)
+    except OSError:
+        return None  # Unreadable sources fail during conversion
+
+
+def group_duplicates(files):
+    """Return {leader: [duplicates]} for files with identical contents.
+
+    Files are hashed in parallel; the first of each set of identical files
+    (in the given order) is the leader that gets encoded.
+    """
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        digests = list(pool.map(_hash_or_none, files))
+    leaders = {}
+    groups = {}
+    for path, digest in zip(files, digests):
+        if digest is None:
+            groups[path] = []
+        elif digest in leaders:
+            groups[leaders[digest]].append(path)
+        else:
+            leaders[digest] = path
+            groups[path] = []
+    return groups
+
+
+def reflink(src, dst):
+    """Clone src to dst sharing its blocks; raises OSError where unsupported"""
+    if sys.platform == 'darwin':
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.ENOTSUP, "reflinks are not supported on this platform")
+    import fcntl
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.unlink(dst)
+            raise
+
+
+def share_output(src, dst):
+    """Make dst a copy of src, as cheaply as the filesystem allows.
+
+    Returns 'reflink', 'hardlink' or 'copy'. Reflinks come first because
+    the two files stay independent; hardlinks share one inode, which is safe
+    because write_output never writes through an existing file. The copy is
+    made next to dst and renamed over it, so dst is never left half-written.
+    """
+    tmp_path = dst + ".tmp"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+    try:
+        reflink(src, tmp_path)
+        method = 'reflink'
+    except OSError:
+        try:
+            os.link(src, tmp_path)
+            method = 'hardlink'
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+            method = 'copy'
+    os.replace(tmp_path, dst)
+    return method
@@ -0,0 +1,718 @@
+"""GUI-independent decode/resize/encode pipeline"""
+import io
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+
+from PIL import Image
+# Registered directly: saving to a format preinit() does not cover would
+# otherwise make Pillow import all of its ~45 plugins on the first encode
+from PIL import WebPImagePlugin  # noqa: F401
+
+from .dedup import group_duplicates, share_output, unique_stems
+from .journal import Journal
+from .manifest import Manifest
+from .scheduler import MemoryScheduler
+from .srcset import write_srcset_manifest
+from .tune import QualitySearch, tune_deadline, tuning_enabled
+
+SUPPORTED_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+DEFAULT_QUALITY = 80
+DEFAULT_MAX_SIZE = 1920
+
+# "quality" decodes at full resolution and runs LANCZOS from there, "fast"
+# lets the decoder shrink on load (JPEG DCT scaling to the nearest power of
+# two above the target) and box-reduces before finishing with LANCZOS.
+RESIZE_MODES = ('quality', 'fast')
+DEFAULT_RESIZE_MODE = 'quality'
+
+# Encode time allowed for the quality search of one image
+DEFAULT_MAX_TUNE_SECONDS = 10.0
+
+# Steps of the pipeline timed for every file
+STAGES = ('decode', 'convert', 'resize', 'encode', 'write')
+
+# Files submitted to the process pool ahead of completion, per worker
+SUBMIT_WINDOW = 2
+
+# Keep at least this factor between the reduced image and the target so the
+# final LANCZOS pass still has enough source pixels to filter from
+FAST_REDUCING_GAP = 2.0
+
+# Encoder presets: libwebp effort (method 0-6, slower is smaller), the
+# quality of the alpha plane, and the effort spent on lossless encodes.
+# "lossless" always encodes losslessly; the others try a lossless encode
+# as well for flat-colour and palette sources and keep the smaller file.
+ENCODER_PRESETS = {
+    'fast': {'method': 0, 'alpha_quality': 90, 'lossless_effort': 25, 'lossless': False},
+    'balanced': {'method': 4, 'alpha_quality': 90, 'lossless_effort': 75, 'lossless': False},
+    'smallest': {'method': 6, 'alpha_quality': 75, 'lossless_effort': 90, 'lossless': False},
+    'lossless': {'method': 4, 'alpha_quality': 100, 'lossless_effort': 75, 'lossless': True},
+}
+DEFAULT_PRESET = 'balanced'
+
+# Images to encode with at most this many colours count as flat. Resizing
+# blends new colours in, so these are mostly unresized graphics.
+FLAT_MAX_COLORS = 256
+# Modes checked for flat content. Every single-channel image (and so every
+# grayscale photo) has at most 256 grey levels, and getcolors does not
+# support 16-bit modes; palette sources arrive here as RGB or RGBA.
+FLAT_MODES = ('RGB', 'RGBA')
+# Integer modes of 16-bit (and 32-bit) grayscale images, which Pillow would
+# clip rather than scale when converting them to 8 bits per channel
+WIDE_GRAY_MODES = ('I', 'I;16', 'I;16B', 'I;16L', 'I;16N')
+
+
+@dataclass
+class ConversionSettings:
+    """Options shared by every file in a batch"""
+    quality: int = DEFAULT_QUALITY
+    max_size: int = DEFAULT_MAX_SIZE
+    preserve_aspect: bool = True
+    resize_mode: str = DEFAULT_RESIZE_MODE
+    # Output widths for responsive (srcset) images; when set, max_size is
+    # ignored and one file per width is written
+    widths: tuple = ()
+    # Quality auto-tuning: the highest quality within target_bytes, or the
+    # lowest that reaches min_ssim/min_psnr; 0 disables each target
+    target_bytes: int = 0
+    min_ssim: float = 0.0
+    min_psnr: float = 0.0
+    max_tune_seconds: float = DEFAULT_MAX_TUNE_SECONDS
+    preset: str = DEFAULT_PRESET
+
+    @property
+    def fast(self):
+        return self.resize_mode == 'fast'
+
+    @property
+    def encoder(self):
+        return ENCODER_PRESETS[self.preset]
+
+
+@dataclass
+class ConversionResult:
+    """Outcome of converting a single source file"""
+    source: str
+    output: str = None
+    error: str = None
+    skipped: bool = False
+    # Wall time in seconds of each STAGES step that ran
+    timings: dict = field(default_factory=dict)
+    input_bytes: int = 0
+    output_bytes: int = 0
+    input_pixels: int = 0
+    output_pixels: int = 0
+    # (width, path, bytes) of every file written in responsive mode
+    outputs: list = field(default_factory=list)
+    # Encodes performed and the quality finally used (of the largest output)
+    encode_iterations: int = 0
+    quality_used: int = None
+    # Whether the (largest) output was encoded losslessly
+    lossless: bool = False
+    # Set when the source had the same contents as an earlier one in the
+    # batch, whose outputs were shared ('reflink', 'hardlink' or 'copy')
+    duplicate_of: str = None
+    shared_by: str = None
+    # Set on skipped results of files an interrupted run had already
+    # finished (see journal)
+    resumed: bool = False
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def seconds(self):
+        return sum(self.timings.values())
+
+    @property
+    def compression_ratio(self):
+        """Input bytes per output byte"""
+        return self.input_bytes / self.output_bytes if self.output_bytes else None
+
+
+@dataclass
+class BatchSummary:
+    """Collected results of a batch run"""
+    results: list = field(default_factory=list)
+    wall_seconds: float = 0.0
+    cancelled: bool = False
+
+    @property
+    def converted(self):
+        return [r for r in self.results if r.ok and not r.skipped]
+
+    @property
+    def skipped(self):
+        return [r for r in self.results if r.skipped]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+
+def is_supported(file_path):
+    return os.path.splitext(file_path)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def target_size(size, max_size, preserve_aspect=True):
+    """Return the (width, height) an image of the given size is resized to"""
+    if not preserve_aspect:
+        return (max_size, max_size)
+
+    # Calculate new size while preserving aspect ratio
+    width, height = size
+    if width > height:
+        new_width = max_size
+        new_height = int((height * max_size) / width)
+    else:
+        new_height = max_size
+        new_width = int((width * max_size) / height)
+
+    return (max(1, new_width), max(1, new_height))
+
+
+def shrink_on_load(img, size):
+    """Ask the decoder to decode at the smallest scale still >= size.
+
+    Only JPEG supports this (DCT scaling by 1/2, 1/4 or 1/8); it must be
+    called before the image data is loaded and is a no-op for other formats.
+    """
+    if img.format == 'JPEG':
+        img.draft(None, size)
+
+
+def resize_to(img, size, fast=False):
+    if fast:
+        return img.resize(size, Image.LANCZOS, reducing_gap=FAST_REDUCING_GAP)
+    return img.resize(size, Image.LANCZOS)
+
+
+def resize_image(img, max_size, preserve_aspect=True, fast=False):
+    return resize_to(img, target_size(img.size, max_size, preserve_aspect), fast)
+
+
+def output_path_for(file_path, output_dir, width=None, stem=None):
+    """Return the WebP path a source file is written to"""
+    stem = stem or Path(file_path).stem
+    if width is not None:
+        return os.path.join(output_dir, f"{stem}-{width}w.webp")
+    return os.path.join(output_dir, f"{stem}.webp")
+
+
+def parse_widths(text):
+    """Parse '320, 640,1280' into a sorted tuple of widths; '' gives ()"""
+    try:
+        widths = tuple(sorted({int(w) for w in text.split(',') if w.strip()}))
+    except ValueError:
+        raise ValueError("widths must be comma separated numbers") from None
+    if widths and widths[0] < 1:
+        raise ValueError("widths must be positive numbers of pixels")
+    return widths
+
+
+def pyramid_widths(widths, source_width):
+    """Return the requested widths that do not upscale, largest first.
+
+    A source narrower than every requested width is kept at its own width.
+    """
+    usable = sorted({w for w in widths if w <= source_width}, reverse=True)
+    return usable or [source_width]
+
+
+class StageTimer:
+    """Records the wall time of consecutive pipeline stages into a dict"""
+
+    def __init__(self, timings=None):
+        self.timings = timings if timings is not None else {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+def is_flat(img):
+    """Return True for few-colour images, which often compress better losslessly"""
+    if img.mode not in FLAT_MODES:
+        return False
+    # getcolors gives up as soon as it has seen more than FLAT_MAX_COLORS
+    return img.getcolors(FLAT_MAX_COLORS) is not None
+
+
+def to_8bit(img):
+    """Scale 16-bit grayscale images down to 8-bit L; other modes are returned as they are"""
+    if img.mode in WIDE_GRAY_MODES:
+        return img.point(lambda v: v / 256, 'L')
+    return img
+
+
+def encodable(img):
+    """Convert palette images to RGB(A) so they resize smoothly.
+
+    Alpha is kept: RGBA and LA are resized as they are (Pillow premultiplies
+    the alpha while filtering) and saved with their transparency. 16-bit
+    grayscale is scaled to 8 bits, which WebP is limited to.
+    """
+    if img.mode in WIDE_GRAY_MODES:
+        return to_8bit(img)
+    if img.mode == 'PA' or (img.mode == 'P' and 'transparency' in img.info):
+        return img.convert('RGBA')
+    if img.mode == 'P':
+        return img.convert('RGB')
+    return img
+
+
+def load_resized(file_path, settings, timer=None):
+    """Decode file_path and return it converted and resized for encoding"""
+    return decode_resized(file_path, settings, timer)[0]
+
+
+def decode_resized(file_path, settings, timer=None):
+    """Like load_resized, but return (resized image, original size)"""
+    timer = timer or StageTimer()
+    with Image.open(file_path) as img:
+        original_size = img.size
+        new_size = target_size(img.size, settings.max_size, settings.preserve_aspect)
+        if settings.fast:
+            shrink_on_load(img, new_size)
+        img.load()
+        timer.lap('decode')
+
+        img = encodable(img)
+        timer.lap('convert')
+
+        resized = resize_to(img, new_size, settings.fast)
+        timer.lap('resize')
+        return resized, original_size
+
+
+def decode_pyramid(file_path, settings, timer=None):
+    """Decode file_path once and return ([(width, image)], original size).
+
+    The largest width is resized from the decoded image, every smaller one
+    from the previous step, so each step filters fewer pixels.
+    """
+    timer = timer or StageTimer()
+    with Image.open(file_path) as img:
+        original_size = img.size
+        widths = pyramid_widths(settings.widths, img.width)
+        largest = (widths[0], max(1, round(img.height * widths[0] / img.width)))
+        if settings.fast:
+            shrink_on_load(img, largest)
+        img.load()
+        timer.lap('decode')
+
+        img = encodable(img)
+        timer.lap('convert')
+
+        steps = []
+        for width in widths:
+            size = (width, max(1, round(original_size[1] * width / original_size[0])))
+            img = img if img.size == size else resize_to(img, size, settings.fast)
+            steps.append((width, img))
+        timer.lap('resize')
+        return steps, original_size
+
+
+def webp_save_options(settings, lossless=False):
+    """Return the keyword arguments passed to Image.save for these settings"""
+    encoder = settings.encoder
+    if lossless or encoder['lossless']:
+        # For lossless WebP, quality is the compression effort
+        return {'lossless': True, 'quality': encoder['lossless_effort'], 'method': encoder['method']}
+    return {'quality': settings.quality, 'method': encoder['method'],
+            'alpha_quality': encoder['alpha_quality'], 'optimize': True}
+
+
+def encode_webp(img, settings, lossless=False):
+    """Encode img with these settings and return the WebP bytes"""
+    buf = io.BytesIO()
+    img.save(buf, 'WebP', **webp_save_options(settings, lossless))
+    return buf.getvalue()
+
+
+def encode_best(img, settings):
+    """Encode img at settings.quality and return (data, lossless, encodes).
+
+    Flat images are also encoded losslessly and the smaller file is kept.
+    """
+    if settings.encoder['lossless']:
+        return encode_webp(img, settings), True, 1
+    data = encode_webp(img, settings)
+    if not is_flat(img):
+        return data, False, 1
+    lossless_data = encode_webp(img, settings, lossless=True)
+    if len(lossless_data) < len(data):
+        return lossless_data, True, 2
+    return data, False, 2
+
+
+def encode_for_result(img, settings, result, deadline=None):
+    """Encode img, searching for the quality when a tuning target is set.
+
+    deadline (see tune.tune_deadline) bounds the search; pass the same one
+    for every width of a file.
+    """
+    lossless = False
+    if tuning_enabled(settings) and not settings.encoder['lossless']:
+        search = QualitySearch(img, settings, encode_webp, deadline)
+        quality, data = search.run()
+        result.encode_iterations += search.iterations
+    else:
+        data, lossless, encodes = encode_best(img, settings)
+        quality = None if lossless else settings.quality
+        result.encode_iterations += encodes
+    if not result.outputs:
+        result.quality_used = quality
+        result.lossless = lossless
+    return data
+
+
+def write_output(output_path, data):
+    """Write data to output_path atomically.
+
+    The data goes to a temporary file that is fsynced and then renamed over
+    output_path, so a crash leaves either the old output or the complete new
+    one, never a truncated file. Renaming also replaces a hardlinked
+    (deduplicated) output instead of writing through it.
+    """
+    tmp_path = output_path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def convert_file(file_path, output_dir, settings=None, stem=None):
+    """Convert one image to WebP and return its ConversionResult.
+
+    stem overrides the output file name (see dedup.unique_stems).
+    """
+    settings = settings or ConversionSettings()
+    if settings.widths:
+        return convert_responsive(file_path, output_dir, settings, stem)
+    result = ConversionResult(file_path)
+    timer = StageTimer(result.timings)
+    try:
+        result.input_bytes = os.path.getsize(file_path)
+        img_resized, (width, height) = decode_resized(file_path, settings, timer)
+        result.input_pixels = width * height
+        result.output_pixels = img_resized.width * img_resized.height
+
+        data = encode_for_result(img_resized, settings, result)
+        timer.lap('encode')
+
+        output_path = output_path_for(file_path, output_dir, stem=stem)
+        write_output(output_path, data)
+        timer.lap('write')
+
+        result.output = output_path
+        result.output_bytes = len(data)
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def convert_bytes(data, settings=None):
+    """Convert an encoded image held in memory; return (webp_bytes, ConversionResult).
+
+    The same decode, resize and encode steps as convert_file, without
+    touching the filesystem. settings.widths is ignored.
+    """
+    settings = settings or ConversionSettings()
+    result = ConversionResult('<memory>')
+    timer = StageTimer(result.timings)
+    try:
+        result.input_bytes = len(data)
+        img_resized, (width, height) = decode_resized(io.BytesIO(data), settings, timer)
+        result.input_pixels = width * height
+        result.output_pixels = img_resized.width * img_resized.height
+
+        webp = encode_for_result(img_resized, settings, result)
+        timer.lap('encode')
+        result.output_bytes = len(webp)
+        return webp, result
+    except Image.UnidentifiedImageError:
+        # Pillow's own message would show the repr of the BytesIO
+        result.error = "cannot identify image data"
+        return None, result
+    except Exception as e:
+        result.error = str(e)
+        return None, result
+
+
+def convert_responsive(file_path, output_dir, settings, stem=None):
+    """Decode once and write one WebP per width in settings.widths"""
+    result = ConversionResult(file_path)
+    timer = StageTimer(result.timings)
+    try:
+        result.input_bytes = os.path.getsize(file_path)
+        steps, (width, height) = decode_pyramid(file_path, settings, timer)
+        result.input_pixels = width * height
+
+        deadline = tune_deadline(settings)
+        for step_width, img in steps:
+            data = encode_for_result(img, settings, result, deadline)
+            timer.lap('encode')
+
+            output_path = output_path_for(file_path, output_dir, step_width, stem)
+            write_output(output_path, data)
+            timer.lap('write')
+
+            result.outputs.append((step_width, output_path, len(data)))
+            result.output_pixels += img.width * img.height
+            result.output_bytes += len(data)
+        # The largest rendition stands in for the output elsewhere
+        result.output = result.outputs[0][1]
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def duplicate_result(original, file_path, output_dir, stem=None):
+    """Return the result for file_path, whose contents equal original.source,
+    by sharing original's outputs instead of converting it again"""
+    result = ConversionResult(file_path, duplicate_of=original.source)
+    if not original.ok:
+        result.error = original.error
+        return result
+    try:
+        result.input_bytes = os.path.getsize(file_path)
+        shared = original.outputs or [(None, original.output, original.output_bytes)]
+        for width, path, nbytes in shared:
+            output_path = output_path_for(file_path, output_dir, width, stem)
+            # The same file listed twice already has its output
+            if os.path.abspath(output_path) != os.path.abspath(path):
+                result.shared_by = share_output(path, output_path)
+            if width is not None:
+                result.outputs.append((width, output_path, nbytes))
+            result.output = result.output or output_path
+        result.output_bytes = original.output_bytes
+        result.input_pixels = original.input_pixels
+        result.output_pixels = original.output_pixels
+        result.quality_used = original.quality_used
+        result.lossless = original.lossless
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def process_pool(workers):
+    """A ProcessPoolExecutor; multiprocessing is only imported once one is needed"""
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def convert_batch(files, output_dir, settings=None, workers=None, progress=None,
+                  incremental=False, content_hash=False, index=None, profiler=None,
+                  srcset_manifest=False, memory_budget=0, cancel=None, dedup=False,
+                  journal=False, resume=False):
+    """Convert files to WebP, spreading them across a pool of processes.
+
+    progress, if given, is called in the calling process as
+    progress(result, done, total) after every file.
+
+    With incremental enabled, files whose source and settings match the
+    manifest in output_dir are skipped instead of re-encoded. content_hash
+    additionally recognises touched or copied files by their contents.
+
+    index, an optional MetadataIndex, is used to start the largest images
+    first so a few big files do not straggle at the end of the batch.
+
+    profiler, an optional hook with start() and stop() (see profiling), wraps
+    the run. Worker processes are not profiled, so the batch then runs in
+    this process.
+
+    With srcset_manifest and settings.widths set, srcset.json and srcset.html
+    describing every responsive output are written to output_dir.
+
+    memory_budget, in bytes, caps the estimated memory of the jobs running at
+    once (see scheduler.MemoryScheduler); oversized JPEGs are then decoded at
+    reduced resolution.
+
+    cancel, an optional threading.Event, stops the batch once set: no further
+    files are started, the ones already running finish and are recorded, and
+    the summary is marked cancelled.
+
+    Output names are made unique across the batch (see dedup.unique_stems).
+    With dedup, sources with identical contents are converted once and the
+    copies get their outputs by reflink, hardlink or copy.
+
+    With journal, the state of every file is logged to a journal in
+    output_dir (see journal.Journal) that is removed when the batch
+    completes. resume continues the journaled batch instead: files it had
+    finished are reported as skipped, the others are converted.
+    """
+    settings = settings or ConversionSettings()
+    workers = 1 if profiler is not None else workers or default_workers()
+    files = list(files)
+    total = len(files)
+    summary = BatchSummary()
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.start()
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = Manifest(output_dir, content_hash=content_hash) if incremental else None
+    fingerprints = {}
+    stems = unique_stems(files)
+    duplicates = {}
+
+    log = None
+    if journal or resume:
+        log = Journal(output_dir)
+        if resume and log.files:
+            log.reopen()
+        else:
+            resume = False
+            log.begin(files, settings, {
+                'incremental': incremental, 'content_hash': content_hash,
+                'srcset_manifest': srcset_manifest, 'memory_budget': memory_budget, 'dedup': dedup,
+            })
+
+    def start(file_path):
+        if log is not None:
+            log.started(file_path)
+
+    def record(result, journaled=False):
+        if log is not None and not journaled:
+            log.finished(result)
+        if manifest is not None and not result.skipped:
+            if result.ok and result.source in fingerprints:
+                manifest.record(result.source, fingerprints[result.source], settings, result)
+            else:
+                manifest.forget(result.source)
+        summary.results.append(result)
+        if progress:
+            progress(result, len(summary.results), total)
+        for copy in duplicates.get(result.source, ()):
+            record(duplicate_result(result, copy, output_dir, stems[copy]))
+
+    pending = []
+    for file_path in files:
+        if resume and log.is_done(file_path):
+            record(log.finished_result(file_path, ConversionResult), journaled=True)
+            continue
+        if manifest is not None:
+            def output_path(width, file_path=file_path):
+                return output_path_for(file_path, output_dir, width, stems[file_path])
+
+            if manifest.is_current(file_path, settings, output_path):
+                record(manifest.skipped_result(file_path, ConversionResult))
+                continue
+            try:
+                fingerprints[file_path] = manifest.fingerprint(file_path)
+            except OSError:
+                pass  # Unreadable sources fail during conversion
+        pending.append(file_path)
+
+    if dedup and len(pending) > 1:
+        groups = group_duplicates(pending)
+        pending = list(groups)
+        duplicates = {leader: copies for leader, copies in groups.items() if copies}
+
+    if index is not None:
+        def pixels(file_path):
+            info = index.get(file_path)
+            return info.pixels if info is not None else 0
+        pending.sort(key=pixels, reverse=True)
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    completed = False
+    try:
+        if memory_budget:
+            scheduler = MemoryScheduler(memory_budget, workers)
+            jobs = scheduler.plan(pending, settings, index)
+            if scheduler.workers == 1 or len(jobs) <= 1:
+                for job in jobs:
+                    if cancelled():
+                        break
+                    start(job.path)
+                    record(convert_file(job.path, output_dir, job.settings, stems[job.path]))
+            else:
+                with process_pool(min(scheduler.workers, len(jobs))) as pool:
+                    def submit(job):
+                        start(job.path)
+                        return pool.submit(convert_file, job.path, output_dir, job.settings, stems[job.path])
+                    scheduler.run(jobs, submit, record, cancelled)
+        # A pool is pure overhead for a single worker or a single file
+        elif workers == 1 or len(pending) <= 1:
+            for file_path in pending:
+                if cancelled():
+                    break
+                start(file_path)
+                record(convert_file(file_path, output_dir, settings, stems[file_path]))
+        else:
+            workers = min(workers, len(pending))
+            with process_pool(workers) as pool:
+                # Submit lazily so a cancel only waits for the few files the
+                # pool has already started or queued
+                remaining = iter(pending)
+                in_flight = set()
+                while True:
+                    while len(in_flight) < SUBMIT_WINDOW * workers and not cancelled():
+                        file_path = next(remaining, None)
+                        if file_path is None:
+                            break
+                        start(file_path)
+                        in_flight.add(pool.submit(convert_file, file_path, output_dir, settings, stems[file_path]))
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future.result())
+        completed = True
+    finally:
+        if manifest is not None:
+            manifest.save()
+        if profiler is not None:
+            profiler.stop()
+        summary.wall_seconds = time.perf_counter() - started
+        summary.cancelled = cancelled() and len(summary.results) < total
+        if log is not None:
+            log.close(completed and not summary.cancelled)
+    if srcset_manifest and settings.widths:
+        write_srcset_manifest(summary.results, output_dir)
+    return summary
+
+
+def resume_batch(output_dir, workers=None, progress=None, index=None, profiler=None, cancel=None):
+    """Continue the interrupted batch journaled in output_dir.
+
+    The files and the settings and options the batch was started with come
+    from the journal; see convert_batch. Returns None if output_dir holds no
+    interrupted batch.
+    """
+    log = Journal(output_dir)
+    if not log.files:
+        return None
+    known = {f.name for f in fields(ConversionSettings)}
+    settings = ConversionSettings(**{
+        name: tuple(value) if isinstance(value, list) else value
+        for name, value in log.settings.items() if name in known
+    })
+    return convert_batch(
+        log.files, output_dir, settings, workers=workers, progress=progress, index=index,
+        profiler=profiler, cancel=cancel, resume=True, **log.options
+    )
@@ -0,0 +1,209 @@
+"""WebP output size estimation by encoding samples of the real output"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple
+
+from .cache import LRUCache
+from .engine import decode_pyramid, is_flat, load_resized, pyramid_widths, target_size, webp_save_options
+
+# Outputs up to SAMPLE_GRID * SAMPLE_TILE pixels square are encoded whole,
+# larger ones are sampled with a SAMPLE_GRID x SAMPLE_GRID grid of tiles
+SAMPLE_TILE = 256
+SAMPLE_GRID = 3
+
+# Bytes of RIFF/VP8 headers in every WebP file, not proportional to pixels
+WEBP_OVERHEAD = 32
+
+DEFAULT_ESTIMATE_ENTRIES = 1024
+# Resized samples are kept so that quality changes only need a re-encode
+DEFAULT_SAMPLE_ENTRIES = 32
+
+# Cached in place of an estimate for files that could not be sampled
+ESTIMATE_FAILED = -1
+
+# Files encoded to estimate a batch total; the rest are extrapolated
+BATCH_SAMPLE = 24
+# Larger batches are extrapolated from this many evenly spaced files
+BATCH_SCAN_LIMIT = 2000
+
+
+def encoded_size(img, settings, lossless=False):
+    """Return the number of bytes img takes when saved with these settings"""
+    buf = io.BytesIO()
+    img.save(buf, 'WebP', **webp_save_options(settings, lossless))
+    return buf.tell()
+
+
+def sample_tiles(img):
+    """Return (tiles, total_pixels) covering img evenly"""
+    width, height = img.size
+    limit = SAMPLE_TILE * SAMPLE_GRID
+    if width <= limit and height <= limit:
+        return [img], width * height
+
+    tile_w = min(SAMPLE_TILE, width)
+    tile_h = min(SAMPLE_TILE, height)
+    tiles = []
+    for row in range(SAMPLE_GRID):
+        for col in range(SAMPLE_GRID):
+            left = (width - tile_w) * col // (SAMPLE_GRID - 1)
+            top = (height - tile_h) * row // (SAMPLE_GRID - 1)
+            tiles.append(img.crop((left, top, left + tile_w, top + tile_h)))
+    return tiles, width * height
+
+
+def output_pixels(size, settings):
+    """Pixels of all outputs written for a source of this size: one per
+    responsive width, or the single image resized to max_size"""
+    width, height = size
+    if settings.widths:
+        return sum(w * max(1, round(height * w / width)) for w in pyramid_widths(settings.widths, width))
+    width, height = target_size(size, settings.max_size, settings.preserve_aspect)
+    return width * height
+
+
+class SizeEstimator:
+    """Estimates WebP output sizes in a background thread pool.
+
+    Results are memoized in an LRU keyed by (file, mtime, settings). Only the
+    most recently requested settings are worked on, so queued requests left
+    over from a slider drag are dropped instead of delaying the current one.
+    """
+
+    def __init__(self, workers=2, max_entries=DEFAULT_ESTIMATE_ENTRIES):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imagewebify-estimate")
+        self._estimates = LRUCache(max_entries)
+        self._samples = LRUCache(DEFAULT_SAMPLE_ENTRIES)
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self._current = None
+        self.version = 0
+
+    @staticmethod
+    def _mtime(file_path, mtime_ns):
+        if mtime_ns is not None:
+            return mtime_ns
+        try:
+            return os.stat(file_path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def get(self, file_path, settings, mtime_ns=None):
+        """Return the cached estimate in bytes, ESTIMATE_FAILED, or None if not estimated yet"""
+        key = (file_path, self._mtime(file_path, mtime_ns), astuple(settings))
+        return self._estimates.get(key)
+
+    def request(self, file_path, settings, mtime_ns=None):
+        """Queue an estimate for file_path unless it is cached or already queued"""
+        key = (file_path, self._mtime(file_path, mtime_ns), astuple(settings))
+        with self._lock:
+            self._current = key[2]
+            if key in self._inflight or key in self._estimates:
+                return
+            self._inflight.add(key)
+        self._pool.submit(self._run, key, settings)
+
+    def _run(self, key, settings):
+        try:
+            with self._lock:
+                if key[2] != self._current:
+                    return
+            self._estimates.put(key, self.estimate(key[0], settings, key[1]))
+        except Exception:
+            self._estimates.put(key, ESTIMATE_FAILED)
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+                self.version += 1
+
+    def estimate(self, file_path, settings, mtime_ns=None):
+        """Encode samples of the resized output(s) and extrapolate their total size.
+
+        With settings.widths every responsive width is sampled and the sizes
+        are summed, as one file per width is written.
+        """
+        # The resized samples only depend on the geometry, not the quality
+        sample_key = (file_path, self._mtime(file_path, mtime_ns), settings.max_size,
+                      settings.preserve_aspect, settings.resize_mode, settings.widths)
+        samples = self._samples.get(sample_key)
+        if samples is None:
+            if settings.widths:
+                images = [img for _, img in decode_pyramid(file_path, settings)[0]]
+            else:
+                images = [load_resized(file_path, settings)]
+            samples = [sample_tiles(img) + (is_flat(img),) for img in images]
+            self._samples.put(sample_key, samples)
+
+        total = 0
+        for tiles, total_pixels, flat in samples:
+            # Flat images are converted losslessly when that is smaller
+            modes = [False, True] if flat else [False]
+            sizes = []
+            for lossless in modes:
+                payload = 0
+                sampled_pixels = 0
+                for tile in tiles:
+                    payload += max(0, encoded_size(tile, settings, lossless) - WEBP_OVERHEAD)
+                    sampled_pixels += tile.width * tile.height
+                if not sampled_pixels:
+                    return ESTIMATE_FAILED
+                sizes.append(int(payload * total_pixels / sampled_pixels) + WEBP_OVERHEAD)
+            total += min(sizes)
+        return total
+
+    def batch_total(self, paths, settings, index):
+        """Estimate the combined output size of paths.
+
+        Up to BATCH_SAMPLE files spread over the list are encoded; the others
+        are extrapolated from their output pixel count using the average
+        bytes per pixel of the sampled ones. Returns (total_bytes,
+        sampled_count) or None while no sample is ready yet. Batches over
+        BATCH_SCAN_LIMIT files are scaled up from an evenly spaced subset,
+        so paths may be a lazy sequence that only builds the entries read.
+        """
+        if not hasattr(paths, '__len__'):
+            paths = list(paths)
+        if not paths:
+            return None
+        scale = 1.0
+        if len(paths) > BATCH_SCAN_LIMIT:
+            scale = len(paths) / BATCH_SCAN_LIMIT
+            paths = [paths[int(i * scale)] for i in range(BATCH_SCAN_LIMIT)]
+        else:
+            paths = list(paths)
+        step = max(1, len(paths) // BATCH_SAMPLE)
+        sample = set(paths[::step][:BATCH_SAMPLE])
+
+        known_bytes = 0
+        known_pixels = 0
+        unknown_pixels = 0
+        sampled = 0
+        for path in paths:
+            info = index.get(path)
+            if info is None or not info.ok:
+                continue
+            pixels = output_pixels((info.width, info.height), settings)
+            estimate = self.get(path, settings, info.mtime_ns)
+            if estimate is None and path in sample:
+                self.request(path, settings, info.mtime_ns)
+            if estimate == ESTIMATE_FAILED:
+                continue
+            if estimate is None:
+                unknown_pixels += pixels
+            else:
+                known_bytes += estimate
+                known_pixels += pixels
+                sampled += 1
+
+        if not known_pixels:
+            return None
+        return int((known_bytes + known_bytes * unknown_pixels / known_pixels) * scale), sampled
+
+    def clear(self):
+        self._estimates.clear()
+        self._samples.clear()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
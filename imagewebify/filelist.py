@@ -0,0 +1,278 @@
+"""Folder scanning and compact storage for very large file lists"""
+import os
+import queue
+import threading
+from array import array
+from bisect import bisect_right
+
+from .engine import is_supported
+
+# Found paths are handed to the consumer in chunks of this many
+SCAN_CHUNK = 1000
+# Initial size of FileStore's duplicate table; a power of two
+TABLE_START_SLOTS = 1024
+# Archives whose images can be converted (see archive.py), longest first so
+# that '.tar.gz' is matched before '.gz' would be
+ARCHIVE_EXTENSIONS = ('.tar.bz2', '.tar.gz', '.tar.xz', '.tbz2', '.tgz', '.txz', '.tar', '.zip')
+
+
+def archive_type(path):
+    """Return the archive extension path ends with, or None"""
+    lower = path.lower()
+    for extension in ARCHIVE_EXTENSIONS:
+        if lower.endswith(extension):
+            return extension
+    return None
+
+
+def is_archive(path):
+    return archive_type(path) is not None
+
+
+def scan_folder(folder, recursive=True):
+    """Yield the supported image files in folder, directory by directory.
+
+    Each directory is read with a single os.scandir pass and its files are
+    yielded (sorted by name) before the next directory is opened, so callers
+    see results long before a deep tree has been walked. Symlinked folders
+    are not followed, which keeps link loops from recursing forever.
+    """
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif is_supported(entry.name) and entry.is_file():
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        yield from sorted(files)
+        if recursive:
+            stack.extend(sorted(subdirs, reverse=True))
+
+
+class FolderScan:
+    """Runs scan_folder for some folders on a background thread.
+
+    Paths arrive in chunks on a queue; drain() collects whatever has been
+    found so far without blocking, and finished turns True once the walk is
+    over and everything has been drained.
+    """
+
+    def __init__(self, folders, recursive=True, chunk=SCAN_CHUNK):
+        self.folders = list(folders)
+        self.recursive = recursive
+        self.chunk = chunk
+        self.found = 0
+        self._queue = queue.Queue()
+        self._done = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            batch = []
+            for folder in self.folders:
+                for path in scan_folder(folder, self.recursive):
+                    if self._stop.is_set():
+                        return
+                    batch.append(path)
+                    if len(batch) >= self.chunk:
+                        self._queue.put(batch)
+                        batch = []
+            if batch:
+                self._queue.put(batch)
+        finally:
+            self._done.set()
+
+    def drain(self):
+        """Return the paths found since the last call"""
+        paths = []
+        while True:
+            try:
+                paths.extend(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self.found += len(paths)
+        return paths
+
+    @property
+    def finished(self):
+        return self._done.is_set() and self._queue.empty()
+
+    def stop(self):
+        self._stop.set()
+
+
+def path_key(path):
+    """The form of a path two entries are compared by when removing duplicates"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class FileStore:
+    """An append-only list of paths packed into a single buffer.
+
+    Paths are stored UTF-8 encoded back to back in one bytearray with an
+    array of end offsets, instead of one str object per entry. Paths that are
+    already in the store (compared by path_key) are not added again; they are
+    found through an open-addressing table of entry numbers kept in an array,
+    next to an array of the 64-bit hash of every entry's key.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._ends)
+        if not 0 <= index < len(self._ends):
+            raise IndexError("FileStore index out of range")
+        start = self._ends[index - 1] if index else 0
+        return self._data[start:self._ends[index]].decode('utf-8', 'surrogateescape')
+
+    def __iter__(self):
+        for index in range(len(self._ends)):
+            yield self[index]
+
+    def __contains__(self, path):
+        key = path_key(path)
+        return self._table[self._slot(key, hash(key))] != 0
+
+    def _slot(self, key, digest):
+        """Return the table slot holding key, or the empty slot where it belongs"""
+        mask = len(self._table) - 1
+        slot = digest & mask
+        while True:
+            entry = self._table[slot]
+            if not entry:
+                return slot
+            # Slots hold entry index + 1, so 0 marks an empty slot
+            index = entry - 1
+            if self._hashes[index] == digest and path_key(self[index]) == key:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        table = array('I', bytes(len(self._table) * 2 * self._table.itemsize))
+        mask = len(table) - 1
+        for index, digest in enumerate(self._hashes):
+            slot = digest & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = index + 1
+        self._table = table
+
+    def append(self, path):
+        """Add path unless it is already stored; return True if it was added"""
+        key = path_key(path)
+        digest = hash(key)
+        slot = self._slot(key, digest)
+        if self._table[slot]:
+            return False
+        data = self._data
+        data += path.encode('utf-8', 'surrogateescape')
+        self._ends.append(len(data))
+        self._hashes.append(digest)
+        count = len(self._hashes)
+        self._table[slot] = count
+        # Keep the table at most half full so probe runs stay short
+        if count * 2 > len(self._table):
+            self._grow()
+        return True
+
+    def extend(self, paths):
+        """Add paths, skipping duplicates; return how many were added"""
+        return sum(1 for path in paths if self.append(path))
+
+    def clear(self):
+        self._data = bytearray()
+        self._ends = array('Q')
+        self._hashes = array('q')
+        self._table = array('I', bytes(TABLE_START_SLOTS * array('I').itemsize))
+
+
+class StoreView:
+    """A read-only sequence of the store entries at the given indices"""
+
+    def __init__(self, store, indices):
+        self.store = store
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        return self.store[self.indices[i]]
+
+
+class Selection:
+    """Selected indices kept as sorted, non-overlapping [start, stop) ranges.
+
+    Selecting everything in a 100k entry list is a single range, so select
+    all, membership tests and counting stay cheap however long the list is.
+    """
+
+    def __init__(self):
+        self._ranges = []
+
+    def __len__(self):
+        return sum(stop - start for start, stop in self._ranges)
+
+    def __contains__(self, index):
+        i = bisect_right(self._ranges, (index, float('inf'))) - 1
+        return i >= 0 and self._ranges[i][0] <= index < self._ranges[i][1]
+
+    def __iter__(self):
+        for start, stop in self._ranges:
+            yield from range(start, stop)
+
+    def first(self):
+        return self._ranges[0][0] if self._ranges else None
+
+    def clear(self):
+        self._ranges = []
+
+    def select(self, start, stop):
+        """Select exactly the indices from start up to (not including) stop"""
+        self._ranges = [(start, stop)] if start < stop else []
+
+    def add(self, start, stop):
+        """Add the indices from start up to stop to the selection"""
+        if start >= stop:
+            return
+        merged = []
+        for low, high in self._ranges:
+            if high < start or low > stop:
+                merged.append((low, high))
+            else:
+                start, stop = min(start, low), max(stop, high)
+        merged.append((start, stop))
+        merged.sort()
+        self._ranges = merged
+
+    def toggle(self, index):
+        if index not in self:
+            self.add(index, index + 1)
+            return
+        ranges = []
+        for low, high in self._ranges:
+            if low <= index < high:
+                if low < index:
+                    ranges.append((low, index))
+                if index + 1 < high:
+                    ranges.append((index + 1, high))
+            else:
+                ranges.append((low, high))
+        self._ranges = ranges
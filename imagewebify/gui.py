@@ -0,0 +1,993 @@
+"""Tk desktop interface, imported only when the GUI is launched (see main.py)"""
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+import tkinter.font as tkfont
+import os
+import queue
+import threading
+import time
+import sys
+
+from .engine import DEFAULT_PRESET, ENCODER_PRESETS, RESIZE_MODES, ConversionSettings, convert_batch, default_workers, parse_widths, resume_batch
+from .estimate import ESTIMATE_FAILED, SizeEstimator
+from .filelist import FileStore, FolderScan, Selection, StoreView
+from .journal import Journal
+from .metadata import MetadataIndex
+from .preview import PreviewLoader
+from .report import REPORT_NAME, format_bytes, format_duration, format_summary, summarize, write_report
+from .tune import parse_size, tuning_enabled
+
+# Icons and fonts live next to main.py, one level above the package
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+# How often the UI checks the background helpers for new results
+BACKGROUND_POLL_MS = 150
+# Size estimates are only requested once a slider has been still this long
+ESTIMATE_DEBOUNCE_MS = 250
+# Auto quality choices and the ConversionSettings field each one sets
+TUNE_MODES = {
+    "Off": None,
+    "Target size (e.g. 150KB)": "target_bytes",
+    "Min SSIM (0-1)": "min_ssim",
+    "Min PSNR (dB)": "min_psnr",
+}
+# How often an open preview window checks for its decoded images
+PREVIEW_POLL_MS = 50
+# Conversion progress is redrawn at most this often (20 times a second)
+PROGRESS_POLL_MS = 50
+# How often paths found by an "Add Folder" scan are moved into the list
+SCAN_POLL_MS = 100
+
+class VirtualFileList:
+    """A Listbox that only ever holds the rows currently on screen.
+
+    The entries live in a FileStore and the selection in a Selection of store
+    indices, so scrolling redraws a screenful of rows, appends only fill the
+    visible gap, and "select all" stays cheap with 100k files in the list.
+    """
+
+    def __init__(self, parent, store, on_select):
+        self.store = store
+        self.selection = Selection()
+        self.on_select = on_select
+        self.top = 0
+        self.rows = 8
+        self.drawn = 0
+        self.anchor = None
+        self.listbox = tk.Listbox(parent, height=8, selectmode=tk.EXTENDED,
+                                  activestyle='none', exportselection=False)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        
+        self.listbox.bind('<Configure>', self.on_resize)
+        self.listbox.bind('<Button-1>', lambda e: self.click(e, 'single'))
+        self.listbox.bind('<Shift-Button-1>', lambda e: self.click(e, 'range'))
+        self.listbox.bind('<Control-Button-1>', lambda e: self.click(e, 'toggle'))
+        self.listbox.bind('<B1-Motion>', lambda e: self.click(e, 'drag'))
+        self.listbox.bind('<Control-a>', self.select_all)
+        self.listbox.bind('<Up>', lambda e: self.move(-1))
+        self.listbox.bind('<Down>', lambda e: self.move(1))
+        self.listbox.bind('<Prior>', lambda e: self.scroll(-self.rows))
+        self.listbox.bind('<Next>', lambda e: self.scroll(self.rows))
+        self.listbox.bind('<MouseWheel>', self.on_wheel)
+        self.listbox.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda e: self.scroll(3))
+        if self.listbox.tk.call('tk', 'windowingsystem') == 'aqua':
+            self.listbox.bind('<Command-Button-1>', lambda e: self.click(e, 'toggle'))
+            self.listbox.bind('<Command-a>', self.select_all)
+        
+    def grid(self, row, column, columnspan, pady):
+        self.listbox.grid(row=row, column=column, columnspan=columnspan,
+                          sticky=(tk.W, tk.E, tk.N, tk.S), pady=pady)
+        self.scrollbar.grid(row=row, column=column + columnspan, sticky=(tk.N, tk.S), pady=pady)
+        
+    def curselection(self):
+        """Selected store indices in ascending order"""
+        return list(self.selection)
+        
+    def refresh(self):
+        """Redraw the visible rows from the store"""
+        self.top = max(0, min(self.top, len(self.store) - self.rows))
+        self.listbox.delete(0, tk.END)
+        self.drawn = 0
+        self.appended()
+        
+    def appended(self):
+        """Show entries added to the store, touching only rows not yet drawn"""
+        end = min(self.top + self.rows, len(self.store))
+        for index in range(self.top + self.drawn, end):
+            self.listbox.insert(tk.END, os.path.basename(self.store[index]))
+            if index in self.selection:
+                self.listbox.selection_set(index - self.top)
+        self.drawn = max(self.drawn, end - self.top)
+        self.update_scrollbar()
+        
+    def update_scrollbar(self):
+        total = len(self.store)
+        if total <= self.rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.rows) / total)
+            
+    def redraw_selection(self):
+        self.listbox.selection_clear(0, tk.END)
+        for row in range(self.drawn):
+            if self.top + row in self.selection:
+                self.listbox.selection_set(row)
+                
+    def clear(self):
+        self.selection.clear()
+        self.anchor = None
+        self.top = 0
+        self.refresh()
+        
+    def on_resize(self, event):
+        # Tk lays listbox rows out at the font's linespace plus one pixel and
+        # the selection border above and below
+        line = (tkfont.Font(font=self.listbox.cget('font')).metrics('linespace')
+                + 1 + 2 * int(self.listbox.cget('selectborderwidth')))
+        border = 2 * (int(self.listbox.cget('borderwidth')) + int(self.listbox.cget('highlightthickness')))
+        rows = max(1, (event.height - border) // line)
+        if rows != self.rows:
+            self.rows = rows
+            self.refresh()
+            
+    def yview(self, *args):
+        """Scrollbar callback: ('moveto', fraction) or ('scroll', n, 'units'|'pages')"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.store))
+            self.refresh()
+        elif args[0] == 'scroll':
+            step = self.rows if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+            
+    def scroll(self, rows):
+        self.top += rows
+        self.refresh()
+        return "break"
+        
+    def on_wheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(-delta * 3)
+        
+    def see(self, index):
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.rows:
+            self.top = index - self.rows + 1
+        self.refresh()
+        
+    def click(self, event, mode):
+        self.listbox.focus_set()
+        if not self.drawn:
+            return "break"
+        index = self.top + min(self.listbox.nearest(event.y), self.drawn - 1)
+        if mode == 'toggle':
+            self.selection.toggle(index)
+            self.anchor = index
+        elif mode in ('range', 'drag') and self.anchor is not None:
+            self.selection.select(min(self.anchor, index), max(self.anchor, index) + 1)
+        else:
+            self.selection.select(index, index + 1)
+            self.anchor = index
+        self.redraw_selection()
+        self.on_select()
+        return "break"
+        
+    def move(self, step):
+        if not len(self.store):
+            return "break"
+        current = self.anchor if self.anchor is not None else self.top - step
+        index = max(0, min(len(self.store) - 1, current + step))
+        self.selection.select(index, index + 1)
+        self.anchor = index
+        self.see(index)
+        self.on_select()
+        return "break"
+        
+    def select_all(self, event=None):
+        self.selection.select(0, len(self.store))
+        self.redraw_selection()
+        self.on_select()
+        return "break"
+
+
+class ImageConverter:
+    def __init__(self, root):
+        self.root = root
+        self.root.title("ImageWebify")
+        self.root.geometry("600x640")
+        self.root.minsize(600, 640)
+        self.root.resizable(True, True)
+        # The icon is decoded once the window is up rather than before it
+        self.root.after_idle(self.set_application_icon)
+
+        # Load custom fonts
+        try:
+            font_path = os.path.join(ASSETS_DIR, "fonts")
+            self.regular_font = ("fccTYPO-Regular", 12)
+            self.bold_font = ("fccTYPO-Bold", 12)
+        except Exception as e:
+            print(f"Warning: Could not load custom fonts: {e}")
+            self.regular_font = ("Arial", 12)
+            self.bold_font = ("Arial", 12)
+        # Variables
+        self.selected_files = FileStore()
+        self.folder_scan = None
+        self.output_folder = tk.StringVar()
+        self.quality = tk.IntVar(value=80)
+        self.max_size = tk.IntVar(value=1920)
+        self.resize_mode = tk.StringVar(value="quality")
+        self.preset = tk.StringVar(value=DEFAULT_PRESET)
+        self.skip_unchanged = tk.BooleanVar(value=False)
+        self.write_report = tk.BooleanVar(value=False)
+        self.dedup = tk.BooleanVar(value=False)
+        self.responsive_widths = tk.StringVar(value="")
+        self.tune_mode = tk.StringVar(value="Off")
+        self.tune_value = tk.StringVar(value="")
+        self.preserve_aspect = True  # Always preserve aspect ratio
+        self.workers = default_workers()
+        self.metadata = MetadataIndex()
+        self.estimator = SizeEstimator()
+        self.previews = PreviewLoader()
+        self.background_version = None
+        self.max_size_pending = False
+        self.estimate_job = None
+        self.progress_events = queue.Queue()
+        self.cancel_event = None
+        self.converting = False
+        
+        self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(BACKGROUND_POLL_MS, self.poll_background)
+        
+    def set_application_icon(self):
+        try:
+            icon_path = os.path.join(ASSETS_DIR, "icons")
+            if sys.platform == "darwin":
+                icon_file = os.path.join(icon_path, "icon.png")
+                if os.path.exists(icon_file):
+                    icon = tk.PhotoImage(file=icon_file)
+                    self.root.iconphoto(True, icon)
+            elif sys.platform == "win32":
+                icon_file = os.path.join(icon_path, "icon.ico")
+                if os.path.exists(icon_file):
+                    self.root.iconbitmap(icon_file)
+            else:
+                icon_file = os.path.join(icon_path, "icon.png")
+                if os.path.exists(icon_file):
+                    icon = tk.PhotoImage(file=icon_file)
+                    self.root.iconphoto(True, icon)
+        except Exception as e:
+            print(f"Error loading application icon: {str(e)}")
+
+    def setup_ui(self):
+        # Main frame
+        main_frame = ttk.Frame(self.root, padding="10")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        # Configure grid weights
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        # File selection section
+        ttk.Label(main_frame, text="Add Images to List:", font=self.bold_font).grid(
+            row=0, column=0, columnspan=3, sticky=tk.W, pady=(0, 10)
+        )
+        
+        add_frame = ttk.Frame(main_frame)
+        add_frame.grid(row=1, column=0, sticky=tk.W, padx=(0, 10))
+        ttk.Button(add_frame, text="Browse Files", command=self.browse_files, style="Custom.TButton").grid(
+            row=0, column=0, sticky=tk.W
+        )
+        ttk.Button(add_frame, text="Add Folder", command=self.add_folder, style="Custom.TButton").grid(
+            row=0, column=1, sticky=tk.W, padx=(10, 0)
+        )
+        
+        ttk.Button(main_frame, text="Clear Selection", command=self.clear_files, style="Custom.TButton").grid(
+            row=1, column=1, sticky=tk.W
+        )
+        
+        ttk.Button(main_frame, text="Preview", command=self.preview_selected_image, style="Custom.TButton").grid(
+            row=1, column=2, sticky=tk.W, padx=(10, 0)
+        )
+        
+        # File list with its scrollbar, drawing only the visible rows
+        self.file_list = VirtualFileList(main_frame, self.selected_files, self.on_file_select)
+        self.file_list.grid(row=2, column=0, columnspan=3, pady=(10, 0))
+        
+        # Instruction label
+        ttk.Label(main_frame, text="💡 Select one or more files from the list above to convert (use Command ⌘ or Shift to multi-select on Mac, Ctrl or Shift on Windows, Ctrl+A for all)", 
+                 font=self.regular_font, foreground="gray").grid(
+            row=3, column=0, columnspan=3, sticky=tk.W, pady=(5, 0)
+        )
+        
+        # Set up custom style for LabelFrame label (optional, may not work on all platforms)
+        style = ttk.Style()
+        try:
+            style.configure("Custom.TLabelframe.Label", font=self.bold_font)
+            labelframe_style = "Custom.TLabelframe"
+        except Exception:
+            labelframe_style = None
+        # Set up custom style for all buttons
+        style.configure("Custom.TButton", font=self.bold_font)
+
+        # File info section
+        if labelframe_style:
+            info_frame = ttk.LabelFrame(main_frame, text="File Information", padding="10", style=labelframe_style)
+        else:
+            info_frame = ttk.LabelFrame(main_frame, text="File Information", padding="10")
+        info_frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        info_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(info_frame, text="Current Size:", font=self.regular_font).grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        self.current_size_label = ttk.Label(info_frame, text="No file selected", font=self.regular_font)
+        self.current_size_label.grid(row=0, column=1, sticky=tk.W)
+        
+        ttk.Label(info_frame, text="Estimated WebP Size:", font=self.regular_font).grid(row=1, column=0, sticky=tk.W, padx=(0, 10))
+        self.estimated_size_label = ttk.Label(info_frame, text="No file selected", font=self.regular_font)
+        self.estimated_size_label.grid(row=1, column=1, sticky=tk.W)
+        
+        ttk.Label(info_frame, text="Estimated Batch Total:", font=self.regular_font).grid(row=2, column=0, sticky=tk.W, padx=(0, 10))
+        self.batch_size_label = ttk.Label(info_frame, text="No file selected", font=self.regular_font)
+        self.batch_size_label.grid(row=2, column=1, sticky=tk.W)
+        
+        # Output folder section
+        ttk.Label(main_frame, text="Output Folder:", font=self.bold_font).grid(
+            row=5, column=0, columnspan=3, sticky=tk.W, pady=(20, 5)
+        )
+        
+        output_frame = ttk.Frame(main_frame)
+        output_frame.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        output_frame.columnconfigure(0, weight=1)
+        
+        self.output_entry = ttk.Entry(output_frame, textvariable=self.output_folder, width=50, font=self.regular_font)
+        self.output_entry.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+        
+        ttk.Button(output_frame, text="Browse", command=self.browse_output, style="Custom.TButton").grid(
+            row=0, column=1, sticky=tk.W
+        )
+        
+        # Settings section
+        if labelframe_style:
+            settings_frame = ttk.LabelFrame(main_frame, text="Conversion Settings", padding="10", style=labelframe_style)
+        else:
+            settings_frame = ttk.LabelFrame(main_frame, text="Conversion Settings", padding="10")
+        settings_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+        settings_frame.columnconfigure(1, weight=1)
+        
+        # Quality slider
+        ttk.Label(settings_frame, text="Quality:", font=self.regular_font).grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        
+        quality_frame = ttk.Frame(settings_frame)
+        quality_frame.grid(row=0, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        quality_frame.columnconfigure(0, weight=1)
+        
+        self.quality_scale = ttk.Scale(
+            quality_frame, from_=1, to=100, orient=tk.HORIZONTAL, 
+            variable=self.quality, command=self.update_quality_label
+        )
+        self.quality_scale.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+        
+        self.quality_label = ttk.Label(quality_frame, text="80%", font=self.regular_font)
+        self.quality_label.grid(row=0, column=1, sticky=tk.W)
+        
+        # Max size slider
+        ttk.Label(settings_frame, text="Max Size (longest side):", font=self.regular_font).grid(row=1, column=0, sticky=tk.W, pady=(10, 5))
+        
+        size_frame = ttk.Frame(settings_frame)
+        size_frame.grid(row=1, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 5))
+        size_frame.columnconfigure(0, weight=1)
+        
+        self.size_scale = tk.Scale(
+            size_frame, from_=100, to=4000, orient=tk.HORIZONTAL, 
+            variable=self.max_size, command=self.update_size_label,
+            resolution=100, showvalue=0
+        )
+        self.size_scale.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+        
+        self.size_label = ttk.Label(size_frame, text="1920px", font=self.regular_font)
+        self.size_label.grid(row=0, column=1, sticky=tk.W)
+        
+        # Resize mode
+        ttk.Label(settings_frame, text="Resize Mode:", font=self.regular_font).grid(row=2, column=0, sticky=tk.W, pady=(10, 0))
+        
+        resize_mode_box = ttk.Combobox(
+            settings_frame, textvariable=self.resize_mode, values=RESIZE_MODES,
+            state="readonly", width=10, font=self.regular_font
+        )
+        resize_mode_box.grid(row=2, column=1, sticky=tk.W, pady=(10, 0))
+        resize_mode_box.bind('<<ComboboxSelected>>', lambda event: self.schedule_estimate())
+        
+        # Encoder preset
+        ttk.Label(settings_frame, text="Encoder Preset:", font=self.regular_font).grid(row=3, column=0, sticky=tk.W, pady=(10, 0))
+        
+        preset_frame = ttk.Frame(settings_frame)
+        preset_frame.grid(row=3, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        preset_box = ttk.Combobox(
+            preset_frame, textvariable=self.preset, values=list(ENCODER_PRESETS),
+            state="readonly", width=10, font=self.regular_font
+        )
+        preset_box.grid(row=0, column=0, sticky=tk.W)
+        preset_box.bind('<<ComboboxSelected>>', lambda event: self.schedule_estimate())
+        ttk.Label(
+            preset_frame, text="flat/palette images use lossless when smaller",
+            font=self.regular_font, foreground="gray"
+        ).grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
+        
+        # Responsive widths
+        ttk.Label(settings_frame, text="Responsive Widths:", font=self.regular_font).grid(row=4, column=0, sticky=tk.W, pady=(10, 0))
+        
+        widths_frame = ttk.Frame(settings_frame)
+        widths_frame.grid(row=4, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        ttk.Entry(widths_frame, textvariable=self.responsive_widths, width=24, font=self.regular_font).grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(
+            widths_frame, text="e.g. 320,640,1280 (one file per width, overrides max size)",
+            font=self.regular_font, foreground="gray"
+        ).grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
+        
+        # Quality auto-tuning
+        ttk.Label(settings_frame, text="Auto Quality:", font=self.regular_font).grid(row=5, column=0, sticky=tk.W, pady=(10, 0))
+        
+        tune_frame = ttk.Frame(settings_frame)
+        tune_frame.grid(row=5, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        ttk.Combobox(
+            tune_frame, textvariable=self.tune_mode, values=list(TUNE_MODES),
+            state="readonly", width=18, font=self.regular_font
+        ).grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(tune_frame, textvariable=self.tune_value, width=10, font=self.regular_font).grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
+        
+        # Incremental conversion
+        ttk.Checkbutton(
+            settings_frame, text="Skip files unchanged since the last conversion",
+            variable=self.skip_unchanged
+        ).grid(row=6, column=0, columnspan=3, sticky=tk.W, pady=(10, 0))
+        
+        # Per-file report
+        ttk.Checkbutton(
+            settings_frame, text=f"Write a per-file report ({REPORT_NAME}) to the output folder",
+            variable=self.write_report
+        ).grid(row=7, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        
+        # Content deduplication
+        ttk.Checkbutton(
+            settings_frame, text="Convert identical images once (compares file contents)",
+            variable=self.dedup
+        ).grid(row=8, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        
+        # Convert and cancel buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=8, column=0, columnspan=3, pady=(20, 10))
+        self.convert_btn = ttk.Button(
+            button_frame, text="Convert Selected Images", command=self.start_conversion,
+            style="Custom.TButton"
+        )
+        self.convert_btn.grid(row=0, column=0)
+        self.cancel_btn = ttk.Button(
+            button_frame, text="Cancel", command=self.cancel_conversion,
+            style="Custom.TButton", state=tk.DISABLED
+        )
+        self.cancel_btn.grid(row=0, column=1, padx=(10, 0))
+        self.resume_btn = ttk.Button(
+            button_frame, text="Resume", command=self.resume_conversion,
+            style="Custom.TButton"
+        )
+        self.resume_btn.grid(row=0, column=2, padx=(10, 0))
+        
+        # Progress bar
+        self.progress = ttk.Progressbar(main_frame, mode='determinate')
+        self.progress.grid(row=9, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        # Status label
+        self.status_label = ttk.Label(main_frame, text="Ready to convert images", font=self.regular_font)
+        self.status_label.grid(row=10, column=0, columnspan=3, sticky=tk.W)
+        
+    def update_quality_label(self, value):
+        self.quality_label.config(text=f"{int(float(value))}%")
+        self.schedule_estimate()
+        
+    def update_size_label(self, value):
+        self.size_label.config(text=f"{int(float(value))}px")
+        self.schedule_estimate()
+        
+    def schedule_estimate(self):
+        """Debounce slider changes so estimates only start once the slider settles"""
+        if self.estimate_job is not None:
+            self.root.after_cancel(self.estimate_job)
+        self.estimate_job = self.root.after(ESTIMATE_DEBOUNCE_MS, self.run_scheduled_estimate)
+        
+    def run_scheduled_estimate(self):
+        self.estimate_job = None
+        self.update_file_info()
+        
+    def browse_files(self):
+        filetypes = [
+            ("Image files", "*.jpg *.jpeg *.JPG *.JPEG *.PNG *.png"),
+            ("All files", "*.*")
+        ]
+        
+        files = filedialog.askopenfilenames(
+            title="Select JPG/JPEG images",
+            filetypes=filetypes
+        )
+        
+        if files:
+            self.selected_files.extend(files)
+            self.metadata.add(files)
+            self.max_size_pending = True
+            self.file_list.appended()
+            self.auto_set_output_folder(files[0])  # Use first selected file's directory
+            
+    def add_folder(self):
+        """Add every JPG/PNG below a folder, scanning it in the background"""
+        folder = filedialog.askdirectory(title="Select a folder of images")
+        if not folder:
+            return
+        if self.folder_scan is not None:
+            self.folder_scan.stop()
+        self.folder_scan = FolderScan([folder])
+        self.output_folder.set(folder)
+        self.status_label.config(text=f"Scanning {folder}...")
+        self.root.after(SCAN_POLL_MS, self.poll_folder_scan, self.folder_scan)
+        
+    def poll_folder_scan(self, scan):
+        """Move paths found by the folder scan into the list, skipping duplicates"""
+        if scan is not self.folder_scan:
+            return  # Replaced by a newer scan or cleared
+        added = [path for path in scan.drain() if self.selected_files.append(path)]
+        if added:
+            self.metadata.add(added)
+            self.max_size_pending = True
+            self.file_list.appended()
+        if scan.finished:
+            self.folder_scan = None
+            self.status_label.config(text=f"Found {scan.found} images, {len(self.selected_files)} in the list")
+        else:
+            self.status_label.config(text=f"Scanning... {scan.found} images found")
+            self.root.after(SCAN_POLL_MS, self.poll_folder_scan, scan)
+            
+    def auto_set_output_folder(self, first_file_path):
+        """Automatically set output folder to the same directory as the input files"""
+        try:
+            input_directory = os.path.dirname(first_file_path)
+            self.output_folder.set(input_directory)
+        except Exception:
+            pass  # If there's any error, just skip auto-setting
+            
+    def poll_background(self):
+        """Refresh the UI once background header scans or estimates make progress"""
+        version = (self.metadata.version, self.estimator.version)
+        if version != self.background_version:
+            self.background_version = version
+            if self.max_size_pending and self.metadata.pending_count == 0:
+                self.max_size_pending = False
+                self.auto_update_max_size()
+            self.update_file_info()
+        self.root.after(BACKGROUND_POLL_MS, self.poll_background)
+            
+    def auto_update_max_size(self):
+        """Automatically update the max size slider based on the largest image dimension"""
+        if not self.selected_files:
+            return
+            
+        max_dimension = self.metadata.max_dimension()
+                
+        if max_dimension > 0:
+            # Round up to nearest 100
+            suggested_size = ((max_dimension + 99) // 100) * 100
+            # Ensure it's within our slider range
+            suggested_size = max(100, min(4000, suggested_size))
+            self.max_size.set(suggested_size)
+            self.update_size_label(suggested_size)
+            
+    def clear_files(self):
+        if self.folder_scan is not None:
+            self.folder_scan.stop()
+            self.folder_scan = None
+        self.selected_files.clear()
+        self.metadata.clear()
+        self.max_size_pending = False
+        self.file_list.clear()
+        self.update_file_info()
+        
+    def browse_output(self):
+        folder = filedialog.askdirectory(title="Select output folder")
+        if folder:
+            self.output_folder.set(folder)
+            
+    def format_file_size(self, size_bytes):
+        """Convert bytes to human readable format"""
+        if size_bytes < 1024:
+            return f"{size_bytes} B"
+        elif size_bytes < 1024 * 1024:
+            return f"{size_bytes / 1024:.1f} KB"
+        else:
+            return f"{size_bytes / (1024 * 1024):.1f} MB"
+    
+    def on_file_select(self):
+        """Handle file selection in listbox"""
+        selection = self.file_list.curselection()
+        if selection and selection[0] < len(self.selected_files):
+            # Pick up edits made since the file was added; the new size and
+            # mtime also key a fresh size estimate
+            self.metadata.refresh(self.selected_files[selection[0]])
+        self.update_file_info()
+        if selection and selection[0] < len(self.selected_files):
+            self.previews.thumbnail(self.selected_files[selection[0]])
+            self.previews.prefetch(self.selected_files, selection[0])
+    
+    def current_settings(self):
+        return ConversionSettings(
+            quality=self.quality.get(),
+            max_size=self.max_size.get(),
+            preserve_aspect=self.preserve_aspect,
+            resize_mode=self.resize_mode.get(),
+            preset=self.preset.get(),
+            widths=self.parsed_widths(),
+            **self.parsed_tuning_target()
+        )
+
+    def parsed_tuning_target(self):
+        try:
+            return self.tuning_target()
+        except ValueError:
+            return {}
+
+    def tuning_target(self):
+        """Return the auto quality setting as ConversionSettings keyword arguments"""
+        field = TUNE_MODES.get(self.tune_mode.get())
+        if not field:
+            return {}
+        value = self.tune_value.get()
+        if field == "target_bytes":
+            return {field: parse_size(value)}
+        return {field: float(value)}
+
+    def parsed_widths(self):
+        try:
+            return parse_widths(self.responsive_widths.get())
+        except ValueError:
+            return ()
+
+    def update_file_info(self):
+        """Update file size information for selected file"""
+        selection = self.file_list.curselection()
+        if not selection or not self.selected_files:
+            self.current_size_label.config(text="No file selected")
+            self.estimated_size_label.config(text="No file selected")
+            self.batch_size_label.config(text="No file selected")
+            return
+
+        settings = self.current_settings()
+        self.update_batch_estimate(selection, settings)
+
+        try:
+            selected_index = selection[0]
+            if selected_index >= len(self.selected_files):
+                return
+
+            file_path = self.selected_files[selected_index]
+            info = self.metadata.get(file_path)
+            if info is None:
+                self.current_size_label.config(text="Reading...")
+                self.estimated_size_label.config(text="Reading...")
+                return
+            if not info.ok:
+                raise ValueError(info.error)
+            self.current_size_label.config(text=self.format_file_size(info.size_bytes))
+
+            tuned = self.tuned_estimate_text(settings)
+            if tuned is not None:
+                self.estimated_size_label.config(text=tuned)
+                return
+            estimated_size = self.estimator.get(file_path, settings, info.mtime_ns)
+            if estimated_size is None:
+                self.estimator.request(file_path, settings, info.mtime_ns)
+                self.estimated_size_label.config(text="Estimating...")
+            elif estimated_size == ESTIMATE_FAILED:
+                self.estimated_size_label.config(text="Cannot estimate")
+            else:
+                self.estimated_size_label.config(text=self.format_file_size(estimated_size))
+
+        except Exception as e:
+            self.current_size_label.config(text="Error reading file")
+            self.estimated_size_label.config(text="Cannot estimate")
+            
+    def tuned_estimate_text(self, settings):
+        """Auto Quality picks the quality per image, so a sampled estimate at
+        the slider quality would describe an output that is never written"""
+        if not tuning_enabled(settings):
+            return None
+        if settings.target_bytes:
+            return f"Target {self.format_file_size(settings.target_bytes)} per output"
+        return "n/a (Auto Quality)"
+
+    def update_batch_estimate(self, selection, settings):
+        """Show the estimated combined output size of all selected files"""
+        paths = StoreView(self.selected_files, selection)
+        tuned = self.tuned_estimate_text(settings)
+        if tuned is not None:
+            self.batch_size_label.config(text=f"{tuned} for {len(paths)} files")
+            return
+        batch = self.estimator.batch_total(paths, settings, self.metadata)
+        if batch is None:
+            self.batch_size_label.config(text="Estimating...")
+            return
+        total, sampled = batch
+        text = f"{self.format_file_size(total)} for {len(paths)} files"
+        if sampled < len(paths):
+            text += f" (sampled {sampled})"
+        self.batch_size_label.config(text=text)
+        
+    def start_conversion(self):
+        # Get selected files from listbox
+        selection = self.file_list.curselection()
+        if not selection:
+            messagebox.showerror("Error", "Please select at least one image file from the list.")
+            return
+            
+        # Get the actual file paths for selected indices
+        files_to_convert = []
+        for index in selection:
+            if index < len(self.selected_files):
+                files_to_convert.append(self.selected_files[index])
+        
+        if not files_to_convert:
+            messagebox.showerror("Error", "No valid files selected for conversion.")
+            return
+            
+        output_dir = self.output_folder.get()
+        if not output_dir:
+            messagebox.showerror("Error", "Please select an output folder.")
+            return
+            
+        try:
+            parse_widths(self.responsive_widths.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid responsive widths: {e}")
+            return
+        try:
+            self.tuning_target()
+        except ValueError:
+            messagebox.showerror("Error", f"Invalid value for {self.tune_mode.get()}.")
+            return
+            
+        # Create output directory if it doesn't exist
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Tk variables are read here; the worker thread only talks back through
+        # progress_events, which the main loop drains in drain_progress
+        self.run_job({
+            "files": files_to_convert,
+            "output_dir": output_dir,
+            "settings": self.current_settings(),
+            "incremental": self.skip_unchanged.get(),
+            "write_report": self.write_report.get(),
+            "dedup": self.dedup.get(),
+            "resume": False,
+        }, f"Converting {len(files_to_convert)} images...")
+        
+    def resume_conversion(self):
+        """Continue an interrupted conversion into the output folder"""
+        output_dir = self.output_folder.get() or filedialog.askdirectory(
+            title="Select the output folder of the interrupted conversion")
+        if not output_dir:
+            return
+        journal = Journal(output_dir)
+        if not journal.files:
+            messagebox.showinfo("Resume", f"No interrupted conversion was found in {output_dir}.")
+            return
+        left = len(journal.unfinished())
+        if not messagebox.askyesno(
+            "Resume",
+            f"{left} of {len(journal.files)} images of the interrupted conversion are left.\n\n"
+            "Convert them with the settings the conversion was started with?"
+        ):
+            return
+        self.run_job({
+            "files": journal.files,
+            "output_dir": output_dir,
+            "write_report": self.write_report.get(),
+            "resume": True,
+        }, f"Resuming: {left} of {len(journal.files)} images left...")
+        
+    def run_job(self, job, status):
+        """Start a conversion job on a worker thread"""
+        self.progress['maximum'] = len(job["files"])
+        self.progress['value'] = 0
+        self.status_label.config(text=status)
+        self.convert_btn.config(state=tk.DISABLED)
+        self.resume_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
+        self.converting = True
+        self.cancel_event = threading.Event()
+        self.conversion_started = time.perf_counter()
+        # Run conversion in a separate thread to prevent UI freezing
+        thread = threading.Thread(target=self.convert_images, args=(job, self.cancel_event))
+        thread.daemon = True
+        thread.start()
+        self.root.after(PROGRESS_POLL_MS, self.drain_progress)
+        
+    def convert_images(self, job, cancel_event):
+        """Run the batch on a worker thread, reporting back through progress_events"""
+        def on_progress(result, done, total):
+            self.progress_events.put(("progress", (result.source, done, total)))
+        
+        try:
+            if job["resume"]:
+                summary = resume_batch(
+                    job["output_dir"], workers=self.workers, progress=on_progress,
+                    index=self.metadata, cancel=cancel_event
+                )
+            else:
+                summary = convert_batch(
+                    job["files"], job["output_dir"], job["settings"],
+                    workers=self.workers, progress=on_progress,
+                    incremental=job["incremental"], index=self.metadata,
+                    srcset_manifest=True, cancel=cancel_event, dedup=job["dedup"],
+                    journal=True
+                )
+        except Exception as e:
+            self.progress_events.put(("error", e))
+            return
+        self.progress_events.put(("finished", (job, summary)))
+        
+    def cancel_conversion(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_btn.config(state=tk.DISABLED)
+            self.status_label.config(text="Cancelling, waiting for running images to finish...")
+        
+    def drain_progress(self):
+        """Apply everything the worker reported since the last tick in a single redraw"""
+        latest = None
+        outcome = None
+        while True:
+            try:
+                kind, payload = self.progress_events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest = payload
+            else:
+                outcome = (kind, payload)
+                
+        if latest is not None:
+            source, done, total = latest
+            self.progress['value'] = done
+            if not self.cancel_event.is_set():
+                elapsed = time.perf_counter() - self.conversion_started
+                rate = done / elapsed if elapsed > 0 else 0
+                status = f"{done}/{total}: {os.path.basename(source)}"
+                if rate:
+                    status += f" - {rate:.1f} images/s, {format_duration((total - done) / rate)} left"
+                self.status_label.config(text=status)
+                
+        if outcome is None:
+            self.root.after(PROGRESS_POLL_MS, self.drain_progress)
+            return
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.convert_btn.config(state=tk.NORMAL)
+        self.resume_btn.config(state=tk.NORMAL)
+        self.converting = False
+        kind, payload = outcome
+        if kind == "error":
+            self.status_label.config(text="Conversion failed")
+            messagebox.showerror("Error", f"Conversion failed: {payload}")
+        else:
+            self.finish_conversion(*payload)
+        
+    def finish_conversion(self, job, summary):
+        output_dir = job["output_dir"]
+        converted_count = len(summary.converted)
+        failed_files = [f"{os.path.basename(r.source)}: {r.error}" for r in summary.failed]
+        stats = summarize(summary)
+        summary_msg = format_summary(stats, basename=os.path.basename)
+        
+        if job["write_report"]:
+            report_path = os.path.join(output_dir, REPORT_NAME)
+            try:
+                write_report(summary.results, report_path)
+                summary_msg += f"\n\nReport written to {report_path}"
+            except OSError as e:
+                summary_msg += f"\n\nCould not write report: {e}"
+            
+        # Show completion message
+        if summary.cancelled:
+            messagebox.showinfo(
+                "Conversion Cancelled",
+                f"Cancelled after {len(summary.results)} of {len(job['files'])} images. "
+                f"\"Resume\" converts the rest.\n\n{summary_msg}"
+            )
+        elif failed_files:
+            error_msg = f"Conversion completed with errors.\n\n{summary_msg}\n\nFailed files:\n" + "\n".join(failed_files[:5])
+            if len(failed_files) > 5:
+                error_msg += f"\n... and {len(failed_files) - 5} more"
+            messagebox.showwarning("Conversion Complete", error_msg)
+        else:
+            messagebox.showinfo("Success", f"Successfully converted {converted_count} images to WebP format!\n\n{summary_msg}")
+            
+        status = "Conversion cancelled" if summary.cancelled else "Conversion completed"
+        if stats["images_per_sec"]:
+            status += f": {stats['images_per_sec']:.1f} images/s, saved {format_bytes(stats['bytes_saved'])}"
+        self.status_label.config(text=status)
+        
+    def on_close(self):
+        if self.converting:
+            if not messagebox.askyesno(
+                "Quit",
+                "A conversion is still running. Stop it and quit?\n\n"
+                "Finished images are kept, and \"Resume\" continues with the rest later."
+            ):
+                return
+            # Nothing new is started; the journal already records every
+            # finished image, so whatever is still running is redone on resume
+            self.cancel_event.set()
+        self.root.destroy()
+        
+    def preview_selected_image(self):
+        selection = self.file_list.curselection()
+        if not selection or not self.selected_files:
+            messagebox.showinfo("Preview", "Please select a file to preview.")
+            return
+        index = selection[0]
+        if index >= len(self.selected_files):
+            messagebox.showinfo("Preview", "Invalid selection.")
+            return
+        try:
+            from PIL import ImageTk  # noqa: F401
+        except ImportError:
+            messagebox.showerror("Preview Error", "Pillow's ImageTk is required for preview.")
+            return
+        file_path = self.selected_files[index]
+        settings = self.current_settings()
+
+        # Create preview window right away; images are decoded in the background
+        preview_win = tk.Toplevel(self.root)
+        preview_win.title(f"Preview: {os.path.basename(file_path)}")
+        preview_win.resizable(True, True)
+
+        ttk.Label(preview_win, text="Original", font=self.bold_font).grid(row=0, column=0, padx=10, pady=(10, 0))
+        ttk.Label(
+            preview_win, text=f"WebP (quality {settings.quality}%, max {settings.max_size}px)",
+            font=self.bold_font
+        ).grid(row=0, column=1, padx=10, pady=(10, 0))
+        original_label = ttk.Label(preview_win, text="Loading...", font=self.regular_font)
+        original_label.grid(row=1, column=0, padx=10, pady=10)
+        webp_label = ttk.Label(preview_win, text="Encoding...", font=self.regular_font, compound=tk.TOP)
+        webp_label.grid(row=1, column=1, padx=10, pady=10)
+
+        self.show_preview_when_ready(preview_win, original_label, self.previews.thumbnail(file_path))
+        self.show_preview_when_ready(preview_win, webp_label, self.previews.webp(file_path, settings))
+        self.previews.prefetch(self.selected_files, index)
+
+    def show_preview_when_ready(self, preview_win, label, future):
+        """Poll a background preview future and put its image into label"""
+        if not preview_win.winfo_exists():
+            return
+        if not future.done():
+            self.root.after(PREVIEW_POLL_MS, self.show_preview_when_ready, preview_win, label, future)
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            label.config(text=f"Could not open image:\n{e}")
+            return
+        from PIL import ImageTk
+        if isinstance(result, tuple):
+            img, webp_bytes = result
+            label.config(text=self.format_file_size(webp_bytes))
+        else:
+            img = result
+        img_tk = ImageTk.PhotoImage(img)
+        label.config(image=img_tk)
+        label.image = img_tk  # Keep reference
+
+def main():
+    root = tk.Tk()
+    app = ImageConverter(root)
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""Crash-safe record of a running batch, used to resume interrupted runs"""
+import json
+import os
+
+from .manifest import settings_key
+
+JOURNAL_NAME = ".imagewebify-journal.jsonl"
+JOURNAL_VERSION = 1
+
+# File states; files without a line of their own are still queued
+STARTED = "started"
+DONE = "done"
+FAILED = "failed"
+
+# State lines written between fsyncs. Every line is flushed to the OS at
+# once, so only a power loss can drop the last few, and those files are
+# simply converted again.
+SYNC_EVERY = 64
+
+
+class Journal:
+    """Append-only JSON Lines log of a batch, kept in its output folder.
+
+    The first line describes the batch: its settings, options and the
+    absolute path of every queued file. Each later line moves one file (by
+    its position in that list) to started, done or failed. A torn last line
+    left by a crash is ignored when loading. The journal is removed once a
+    batch completes, so one only exists for interrupted runs.
+    """
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, JOURNAL_NAME)
+        self.files = []
+        self.settings = None
+        self.options = {}
+        self.states = {}
+        self.details = {}
+        self._positions = {}
+        self._file = None
+        self._unsynced = 0
+        self._valid_bytes = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return
+        # Only newline-terminated lines count; anything after the last
+        # newline is a write torn by the crash
+        lines = data.split(b"\n")[:-1]
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return
+        if header.get("version") != JOURNAL_VERSION:
+            return
+        self.files = header["files"]
+        self.settings = header["settings"]
+        self.options = header.get("options", {})
+        self._positions = {path: i for i, path in enumerate(self.files)}
+        self._valid_bytes = len(lines[0]) + 1
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+                path = self.files[entry["i"]]
+            except (ValueError, KeyError, IndexError):
+                break
+            self.states[path] = entry["state"]
+            self.details[path] = entry
+            self._valid_bytes += len(line) + 1
+
+    def is_done(self, file_path):
+        """True if file_path was converted and all its outputs are still there"""
+        path = os.path.abspath(file_path)
+        if self.states.get(path) != DONE:
+            return False
+        entry = self.details[path]
+        outputs = [output for _, output in entry.get("outputs", [])] or [entry.get("output")]
+        return all(output and os.path.exists(output) for output in outputs)
+
+    def unfinished(self):
+        """The queued files that still need converting"""
+        return [path for path in self.files if not self.is_done(path)]
+
+    def finished_result(self, file_path, result_type):
+        """Return a skipped result_type instance for a file done before the interruption"""
+        entry = self.details[os.path.abspath(file_path)]
+        result = result_type(file_path, output=entry.get("output"), skipped=True, resumed=True)
+        for width, path in entry.get("outputs", []):
+            result.outputs.append((width, path, os.path.getsize(path)))
+        return result
+
+    def begin(self, files, settings, options):
+        """Start a new journal for files, replacing any previous one"""
+        self.files = [os.path.abspath(path) for path in files]
+        self.settings = settings_key(settings)
+        self.options = dict(options)
+        self.states = {}
+        self.details = {}
+        self._positions = {path: i for i, path in enumerate(self.files)}
+        self._file = open(self.path, 'w', encoding='utf-8')
+        header = {"version": JOURNAL_VERSION, "settings": self.settings,
+                  "options": self.options, "files": self.files}
+        self._file.write(json.dumps(header) + "\n")
+        self.sync()
+
+    def reopen(self):
+        """Continue appending to the loaded journal, dropping any torn tail"""
+        os.truncate(self.path, self._valid_bytes)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _write(self, file_path, state, **details):
+        path = os.path.abspath(file_path)
+        entry = {"i": self._positions[path], "state": state}
+        entry.update(details)
+        self.states[path] = state
+        self.details[path] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= SYNC_EVERY:
+            self.sync()
+
+    def started(self, file_path):
+        self._write(file_path, STARTED)
+
+    def finished(self, result):
+        if not result.ok:
+            self._write(result.source, FAILED, error=result.error)
+            return
+        details = {"output": os.path.abspath(result.output)}
+        if result.outputs:
+            details["outputs"] = [[width, os.path.abspath(path)] for width, path, _ in result.outputs]
+        self._write(result.source, DONE, **details)
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self, complete):
+        """Close the journal, deleting it if the batch ran to completion"""
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
+        if complete:
+            os.unlink(self.path)
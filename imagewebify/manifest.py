@@ -0,0 +1,137 @@
+"""Persistent record of converted files, used to skip unchanged sources"""
+import hashlib
+import json
+import os
+from dataclasses import asdict
+
+MANIFEST_NAME = ".imagewebify-manifest.json"
+MANIFEST_VERSION = 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(file_path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def recorded_outputs(entry):
+    """Return the [(width, path)] of a manifest entry; width is None for a single output"""
+    return [tuple(output) for output in entry.get("outputs", [])] or [(None, entry.get("output", ""))]
+
+
+def settings_key(settings):
+    """Return the settings as a plain dict that can be stored and compared"""
+    # Round-trip through JSON so tuples compare equal to the lists loaded back
+    return json.loads(json.dumps(asdict(settings)))
+
+
+class Manifest:
+    """Maps each source file and the settings it was converted with to its output.
+
+    The manifest lives in the output folder. An entry matches when the source
+    size and mtime are unchanged (or, with content_hash enabled, when the
+    contents hash the same), the settings are equal and the output still exists
+    under the name this run would give it. Each output belongs to one source:
+    recording a source that took over another one's output forgets the other.
+    """
+
+    def __init__(self, output_dir, content_hash=False):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.content_hash = content_hash
+        self.entries = {}
+        self._owners = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("entries", {})
+        self._owners = {path: source for source, entry in self.entries.items()
+                        for _, path in recorded_outputs(entry)}
+
+    def save(self):
+        # Write to a temporary file first so an interrupted save never
+        # leaves a truncated manifest behind
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+    def fingerprint(self, file_path):
+        """Return the identifying details of a source file as stored in the manifest"""
+        stat = os.stat(file_path)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if self.content_hash:
+            entry["sha256"] = file_hash(file_path)
+        return entry
+
+    def is_current(self, file_path, settings, output_path=None):
+        """Return True if file_path was already converted with these settings.
+
+        output_path(width) gives the path this run would write for a width
+        (None for a single output). Output names depend on the other sources
+        in the batch, so an entry whose outputs were named differently is
+        converted again under its new name.
+        """
+        entry = self.entries.get(os.path.abspath(file_path))
+        if not entry or entry.get("settings") != settings_key(settings):
+            return False
+        for width, path in recorded_outputs(entry):
+            if not os.path.exists(path):
+                return False
+            if output_path is not None and path != os.path.abspath(output_path(width)):
+                return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        # Touched or copied files keep their entry if the contents are unchanged
+        if self.content_hash and entry.get("sha256") and stat.st_size == entry["size"]:
+            if file_hash(file_path) == entry["sha256"]:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                return True
+        return False
+
+    def record(self, file_path, fingerprint, settings, result):
+        entry = dict(fingerprint)
+        entry["settings"] = settings_key(settings)
+        entry["output"] = os.path.abspath(result.output)
+        if result.outputs:
+            entry["outputs"] = [[width, os.path.abspath(path)] for width, path, _ in result.outputs]
+        source = os.path.abspath(file_path)
+        self.forget(source)
+        for _, path in recorded_outputs(entry):
+            owner = self._owners.get(path)
+            if owner is not None and owner != source:
+                # That source's output was overwritten, so it must be converted again
+                self.forget(owner)
+            self._owners[path] = source
+        self.entries[source] = entry
+
+    def skipped_result(self, file_path, result_type):
+        """Return a skipped result_type instance describing the recorded outputs"""
+        entry = self.entries.get(os.path.abspath(file_path), {})
+        result = result_type(file_path, output=entry.get("output"), skipped=True)
+        for width, path in entry.get("outputs", []):
+            result.outputs.append((width, path, os.path.getsize(path)))
+        return result
+
+    def forget(self, file_path):
+        source = os.path.abspath(file_path)
+        entry = self.entries.pop(source, None)
+        if entry is None:
+            return
+        for _, path in recorded_outputs(entry):
+            if self._owners.get(path) == source:
+                del self._owners[path]
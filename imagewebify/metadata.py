@@ -0,0 +1,159 @@
+"""Background, header-only metadata index for the file list"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from PIL import Image
+
+# Header reads are I/O bound (network shares especially), so use more
+# threads than cores
+DEFAULT_SCAN_WORKERS = 16
+# Paths read by one pool task. A Future per path would cost more memory
+# than the header read of a small file and add up over 100k-file lists.
+SCAN_CHUNK = 64
+
+
+@dataclass
+class ImageInfo:
+    """Dimensions and file details of one source image"""
+    path: str
+    width: int = 0
+    height: int = 0
+    format: str = None
+    mode: str = None
+    size_bytes: int = 0
+    mtime_ns: int = 0
+    error: str = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def longest_side(self):
+        return max(self.width, self.height)
+
+    @property
+    def pixels(self):
+        return self.width * self.height
+
+
+def read_info(file_path):
+    """Read an image's details from its header without decoding pixel data"""
+    info = ImageInfo(file_path)
+    try:
+        stat = os.stat(file_path)
+        info.size_bytes = stat.st_size
+        info.mtime_ns = stat.st_mtime_ns
+        # Image.open only parses the header; pixels are read on load()
+        with Image.open(file_path) as img:
+            info.width, info.height = img.size
+            info.format = img.format
+            info.mode = img.mode
+    except Exception as e:
+        info.error = str(e)
+    return info
+
+
+class MetadataIndex:
+    """Holds an ImageInfo per path, filled in by a background thread pool.
+
+    Adding paths returns immediately; lookups return None until a path has
+    been scanned. version increases whenever an entry is added, so callers
+    can poll for changes cheaply.
+    """
+
+    def __init__(self, workers=DEFAULT_SCAN_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imagewebify-scan")
+        self._lock = threading.Lock()
+        self._infos = {}
+        self._pending = {}
+        self._generation = 0
+        self._max_side = 0
+        self.version = 0
+
+    def add(self, paths):
+        """Queue paths that are not yet indexed for a header scan, SCAN_CHUNK per task"""
+        with self._lock:
+            generation = self._generation
+            new = list(dict.fromkeys(path for path in paths
+                                     if path not in self._infos and path not in self._pending))
+            for start in range(0, len(new), SCAN_CHUNK):
+                chunk = new[start:start + SCAN_CHUNK]
+                future = self._pool.submit(self._scan, chunk, generation)
+                for path in chunk:
+                    self._pending[path] = future
+
+    def _scan(self, paths, generation):
+        """Read the headers of paths; return {path: ImageInfo}"""
+        infos = {}
+        for path in paths:
+            info = infos[path] = read_info(path)
+            with self._lock:
+                # Drop results for paths cleared while they were being scanned
+                if generation != self._generation:
+                    continue
+                self._pending.pop(path, None)
+                self._infos[path] = info
+                if info.ok:
+                    self._max_side = max(self._max_side, info.longest_side)
+                self.version += 1
+        return infos
+
+    def get(self, path, wait=False):
+        """Return the ImageInfo for path, or None if it has not been scanned yet.
+
+        With wait, a path that is queued or unknown is scanned before returning.
+        """
+        with self._lock:
+            info = self._infos.get(path)
+            future = self._pending.get(path)
+        if info is not None or not wait:
+            return info
+        if future is None:
+            self.add([path])
+            with self._lock:
+                future = self._pending.get(path)
+            if future is None:
+                return self._infos.get(path)
+        return future.result()[path]
+
+    def refresh(self, path):
+        """Rescan path if it changed on disk since it was indexed"""
+        with self._lock:
+            info = self._infos.get(path)
+        if info is None:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        if stat.st_mtime_ns != info.mtime_ns or stat.st_size != info.size_bytes:
+            with self._lock:
+                self._infos.pop(path, None)
+            self.add([path])
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def max_dimension(self):
+        """Return the longest side of all indexed images"""
+        with self._lock:
+            return self._max_side
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._infos.clear()
+            self._max_side = 0
+            self.version += 1
+
+    def shutdown(self):
+        self.clear()
+        self._pool.shutdown(wait=False)
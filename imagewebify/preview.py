@@ -0,0 +1,133 @@
+"""Off-thread preview decoding with a memory-bounded thumbnail cache"""
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import astuple
+
+from PIL import Image
+
+from .cache import LRUCache
+from .engine import encode_best, load_resized, to_8bit
+
+PREVIEW_MAX_SIZE = 800
+DEFAULT_PREVIEW_CACHE_BYTES = 64 * 1024 * 1024
+
+# List entries on each side of the selection decoded ahead of time
+PREFETCH_NEIGHBOURS = 2
+
+
+def image_bytes(img):
+    """Approximate in-memory size of a decoded image"""
+    return img.width * img.height * len(img.getbands())
+
+
+def display_image(img):
+    """Convert img to a mode Tk can show directly"""
+    img = to_8bit(img)
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    return img
+
+
+def decode_thumbnail(file_path, max_size=PREVIEW_MAX_SIZE):
+    """Decode file_path no larger than max_size on its longest side.
+
+    Image.thumbnail shrinks JPEGs while decoding (draft) and box-reduces
+    other formats before the final LANCZOS pass.
+    """
+    with Image.open(file_path) as img:
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+        return display_image(img)
+
+
+def render_webp(file_path, settings, max_size=PREVIEW_MAX_SIZE):
+    """Run the real conversion in memory and return (preview, webp_bytes)"""
+    data = encode_best(load_resized(file_path, settings), settings)[0]
+    with Image.open(io.BytesIO(data)) as img:
+        img.thumbnail((max_size, max_size), Image.LANCZOS)
+        return display_image(img), len(data)
+
+
+def _entry_bytes(value):
+    return image_bytes(value[0]) if isinstance(value, tuple) else image_bytes(value)
+
+
+class PreviewLoader:
+    """Decodes original and WebP previews in a background thread pool.
+
+    Results are returned as futures and kept in an LRU cache bounded by
+    max_bytes of decoded pixel data. Prefetches a later prefetch supersedes
+    are cancelled if no worker has started them, so moving through a long
+    list never leaves explicit requests queued behind stale neighbours.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_PREVIEW_CACHE_BYTES, workers=2, max_size=PREVIEW_MAX_SIZE):
+        self.max_size = max_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imagewebify-preview")
+        self._cache = LRUCache(max_bytes=max_bytes, sizeof=_entry_bytes)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        # key -> future of the latest prefetch batch
+        self._prefetched = {}
+
+    @staticmethod
+    def _mtime(file_path):
+        try:
+            return os.stat(file_path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _submit(self, key, fn, *args, prefetch=False):
+        value = self._cache.get(key)
+        if value is not None:
+            future = Future()
+            future.set_result(value)
+            return future
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._pool.submit(self._run, key, fn, *args)
+                self._inflight[key] = future
+            if prefetch:
+                self._prefetched[key] = future
+            else:
+                # Someone waits for it now, so the next prefetch must not cancel it
+                self._prefetched.pop(key, None)
+            return future
+
+    def _run(self, key, fn, *args):
+        try:
+            value = self._cache.get(key)
+            if value is None:
+                value = fn(*args)
+                self._cache.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def thumbnail(self, file_path, prefetch=False):
+        """Return a future for the original image scaled down to max_size"""
+        key = ('original', file_path, self._mtime(file_path), self.max_size)
+        return self._submit(key, decode_thumbnail, file_path, self.max_size, prefetch=prefetch)
+
+    def webp(self, file_path, settings):
+        """Return a future for (preview, webp_bytes) of the converted output"""
+        key = ('webp', file_path, self._mtime(file_path), self.max_size, astuple(settings))
+        return self._submit(key, render_webp, file_path, settings, self.max_size)
+
+    def prefetch(self, files, index, neighbours=PREFETCH_NEIGHBOURS):
+        """Decode thumbnails for the entries around files[index], replacing the last prefetch"""
+        with self._lock:
+            for key, future in self._prefetched.items():
+                if future.cancel():
+                    self._inflight.pop(key, None)
+            self._prefetched = {}
+        for offset in range(1, neighbours + 1):
+            for i in (index + offset, index - offset):
+                if 0 <= i < len(files):
+                    self.thumbnail(files[i], prefetch=True)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
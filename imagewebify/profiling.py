@@ -0,0 +1,61 @@
+"""Optional profiler hooks for a single conversion run"""
+import cProfile
+import pstats
+import tracemalloc
+
+# Allocation sites listed in a tracemalloc report
+TRACEMALLOC_TOP = 25
+
+
+class CProfileHook:
+    """Profiles the run with cProfile and writes the stats to output_path"""
+
+    default_output = "imagewebify.prof"
+
+    def __init__(self, output_path=None):
+        self.output_path = output_path or self.default_output
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        self._profile.dump_stats(self.output_path)
+        return pstats.Stats(self.output_path)
+
+
+class TracemallocHook:
+    """Traces Python allocations during the run and writes the top sites to output_path"""
+
+    default_output = "imagewebify-tracemalloc.txt"
+
+    def __init__(self, output_path=None):
+        self.output_path = output_path or self.default_output
+
+    def start(self):
+        tracemalloc.start()
+
+    def stop(self):
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {peak / (1024 * 1024):.1f} MB\n\n")
+            for stat in snapshot.statistics('lineno')[:TRACEMALLOC_TOP]:
+                f.write(f"{stat}\n")
+        return snapshot
+
+
+PROFILERS = {
+    'cprofile': CProfileHook,
+    'tracemalloc': TracemallocHook,
+}
+
+
+def make_profiler(name, output_path=None):
+    """Return a profiler hook by name ('cprofile' or 'tracemalloc')"""
+    try:
+        return PROFILERS[name](output_path)
+    except KeyError:
+        raise ValueError(f"unknown profiler: {name}") from None
@@ -0,0 +1,143 @@
+"""Structured per-file conversion reports and batch summaries"""
+import json
+
+from .engine import STAGES
+
+REPORT_NAME = "imagewebify-report.jsonl"
+
+# Number of slowest files listed in a summary
+SLOWEST_COUNT = 5
+
+
+def result_status(result):
+    if result.skipped:
+        return "skipped"
+    return "converted" if result.ok else "failed"
+
+
+def result_record(result):
+    """Return a JSON-serialisable dict describing one ConversionResult"""
+    ratio = result.compression_ratio
+    return {
+        "source": result.source,
+        "output": result.output,
+        "status": result_status(result),
+        "error": result.error,
+        "seconds": round(result.seconds, 6),
+        "timings": {stage: round(result.timings[stage], 6) for stage in STAGES if stage in result.timings},
+        "input_bytes": result.input_bytes,
+        "output_bytes": result.output_bytes,
+        "input_pixels": result.input_pixels,
+        "output_pixels": result.output_pixels,
+        "compression_ratio": round(ratio, 3) if ratio else None,
+        "quality": result.quality_used,
+        "lossless": result.lossless,
+        "duplicate_of": result.duplicate_of,
+        "shared_by": result.shared_by,
+        "encode_iterations": result.encode_iterations,
+    }
+
+
+class ReportWriter:
+    """Appends one JSON line per result, so reports of huge batches stream to disk"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, result):
+        self._file.write(json.dumps(result_record(result)) + "\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_report(results, path):
+    """Write a JSON Lines report of results to path"""
+    with ReportWriter(path) as writer:
+        for result in results:
+            writer.write(result)
+
+
+def summarize(summary, slowest=SLOWEST_COUNT):
+    """Aggregate a BatchSummary into throughput, stage totals, bytes saved and slowest files"""
+    converted = summary.converted
+    wall = summary.wall_seconds
+    input_bytes = sum(r.input_bytes for r in converted)
+    output_bytes = sum(r.output_bytes for r in converted)
+    pixels = sum(r.input_pixels for r in converted)
+    # A duplicate saves the time its original took and, when linked, the disk space
+    by_source = {r.source: r for r in converted}
+    duplicates = [r for r in converted if r.duplicate_of]
+    encoded = [r for r in converted if not r.duplicate_of]
+    return {
+        "files": len(summary.results),
+        "converted": len(converted),
+        "skipped": len(summary.skipped),
+        "failed": len(summary.failed),
+        "wall_seconds": wall,
+        "images_per_sec": len(converted) / wall if wall else None,
+        "mp_per_sec": pixels / 1e6 / wall if wall else None,
+        "stage_seconds": {stage: sum(r.timings.get(stage, 0.0) for r in converted) for stage in STAGES},
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "bytes_saved": input_bytes - output_bytes,
+        "encode_iterations": sum(r.encode_iterations for r in converted),
+        "encoded_outputs": sum(len(r.outputs) or 1 for r in encoded),
+        "duplicates": len(duplicates),
+        "dedup_cpu_seconds": sum(by_source[r.duplicate_of].seconds for r in duplicates if r.duplicate_of in by_source),
+        "dedup_bytes": sum(r.output_bytes for r in duplicates if r.shared_by in ('reflink', 'hardlink')),
+        "slowest": [(r.source, r.seconds) for r in sorted(encoded, key=lambda r: r.seconds, reverse=True)[:slowest]],
+    }
+
+
+def format_bytes(size_bytes):
+    """Convert bytes to human readable format"""
+    if abs(size_bytes) < 1024:
+        return f"{size_bytes} B"
+    elif abs(size_bytes) < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    else:
+        return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def format_duration(seconds):
+    """Convert seconds to a short duration such as '45s', '3m 05s' or '1h 02m'"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    elif seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    else:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+def format_summary(stats, basename=None):
+    """Render summarize() output as human readable lines"""
+    name = basename or (lambda path: path)
+    lines = [f"Converted: {stats['converted']}, skipped: {stats['skipped']}, failed: {stats['failed']}"]
+    if stats["images_per_sec"]:
+        lines.append(f"Throughput: {stats['images_per_sec']:.1f} images/s, {stats['mp_per_sec']:.1f} MP/s "
+                     f"({stats['wall_seconds']:.1f} s)")
+    if stats["converted"]:
+        lines.append(f"Size: {format_bytes(stats['input_bytes'])} -> {format_bytes(stats['output_bytes'])} "
+                     f"(saved {format_bytes(stats['bytes_saved'])})")
+        stages = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stats["stage_seconds"].items() if seconds)
+        lines.append(f"CPU time by stage: {stages}")
+        if stats["duplicates"]:
+            lines.append(f"Duplicates: {stats['duplicates']} encoded once, saved {stats['dedup_cpu_seconds']:.1f}s CPU "
+                         f"and {format_bytes(stats['dedup_bytes'])} on disk")
+        if stats["encode_iterations"] > stats["encoded_outputs"]:
+            # Quality searches and lossless trials encode an output more than once
+            lines.append(f"Encodes: {stats['encode_iterations']} for {stats['encoded_outputs']} outputs "
+                         f"({stats['encode_iterations'] / stats['encoded_outputs']:.1f} per output)")
+    if stats["slowest"]:
+        lines.append("Slowest files:")
+        lines.extend(f"  {name(path)}: {seconds:.2f}s" for path, seconds in stats["slowest"])
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+"""Memory-budgeted scheduling of conversion jobs"""
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, replace
+
+from .metadata import MetadataIndex
+
+# Resident memory of an idle worker process (interpreter plus Pillow)
+WORKER_BASELINE_BYTES = 40 * 1024 * 1024
+# At most this share of the budget goes to idle worker processes
+MAX_BASELINE_SHARE = 0.5
+# Head-room for allocator overhead and estimate error
+SAFETY_FACTOR = 1.15
+
+# Bytes per pixel of Pillow's in-memory image storage by mode
+ONE_BYTE_MODES = ('1', 'L', 'P')
+TWO_BYTE_MODES = ('I;16', 'I;16L', 'I;16B', 'I;16N')
+
+
+def bytes_per_pixel(mode):
+    if mode in ONE_BYTE_MODES:
+        return 1
+    if mode in TWO_BYTE_MODES:
+        return 2
+    return 4
+
+
+def jpeg_draft_scale(size, target):
+    """The DCT scale Image.draft picks for a JPEG of size decoded towards target"""
+    scale = min(size[0] // max(1, target[0]), size[1] // max(1, target[1]))
+    for candidate in (8, 4, 2, 1):
+        if scale >= candidate:
+            return candidate
+    return 1
+
+
+def estimate_job_memory(info, settings):
+    """Estimate the peak bytes converting one image takes, from its header"""
+    from .engine import target_size
+
+    if settings.widths:
+        largest = max(settings.widths)
+        new_size = (largest, max(1, info.height * largest // max(1, info.width)))
+    else:
+        new_size = target_size((info.width, info.height), settings.max_size, settings.preserve_aspect)
+
+    scale = 1
+    if settings.fast and info.format == 'JPEG':
+        scale = jpeg_draft_scale((info.width, info.height), new_size)
+    decoded_w = -(-info.width // scale)
+    decoded_h = -(-info.height // scale)
+    decoded_pixels = decoded_w * decoded_h
+    output_pixels = new_size[0] * new_size[1]
+
+    total = decoded_pixels * bytes_per_pixel(info.mode)
+    if info.mode in ('P', 'PA'):
+        # RGB(A) copy of palette images made before resizing
+        total += decoded_pixels * 4
+    # LANCZOS runs horizontally first, then vertically
+    total += new_size[0] * decoded_h * 4 + output_pixels * 4
+    # libwebp's ARGB/YUV working buffers and the encoded output
+    total += output_pixels * 6
+    if settings.min_ssim or settings.min_psnr:
+        # Decoded candidate, reference copy and float SSIM planes
+        total += output_pixels * 28
+    return int(total * SAFETY_FACTOR)
+
+
+@dataclass
+class Job:
+    path: str
+    settings: object
+    memory: int
+    reduced: bool = False
+
+
+def workers_for_budget(workers, budget):
+    """Limit the pool so idle workers use at most MAX_BASELINE_SHARE of the budget"""
+    affordable = int(budget * MAX_BASELINE_SHARE // WORKER_BASELINE_BYTES)
+    return max(1, min(workers, affordable))
+
+
+class MemoryScheduler:
+    """Starts conversion jobs only while their estimated memory fits a budget.
+
+    Jobs are ordered largest first; whenever the next large job does not fit,
+    smaller ones that do are started instead so the cores stay busy. A job
+    larger than the whole budget is switched to reduced-resolution decoding
+    (JPEG shrink-on-load) and, if it still does not fit, runs on its own.
+    """
+
+    def __init__(self, budget, workers):
+        self.budget = budget
+        self.workers = workers_for_budget(workers, budget)
+        self.available = max(1, budget - self.workers * WORKER_BASELINE_BYTES)
+
+    def plan(self, files, settings, index=None):
+        """Return a Job per file, largest estimated memory first"""
+        own_index = index is None
+        if own_index:
+            index = MetadataIndex()
+            index.add(files)
+        try:
+            jobs = [self.job_for(path, settings, index.get(path, wait=True)) for path in files]
+        finally:
+            if own_index:
+                index.shutdown()
+        jobs.sort(key=lambda job: job.memory, reverse=True)
+        return jobs
+
+    def job_for(self, path, settings, info):
+        if info is None or not info.ok:
+            # Let the conversion itself report the error
+            return Job(path, settings, 0)
+        memory = estimate_job_memory(info, settings)
+        if memory > self.available and not settings.fast and info.format == 'JPEG':
+            reduced = replace(settings, resize_mode='fast')
+            return Job(path, reduced, estimate_job_memory(info, reduced), reduced=True)
+        return Job(path, settings, memory)
+
+    def run(self, jobs, submit, on_done, cancelled=None):
+        """Submit jobs through submit(job) -> future and pass each result to on_done.
+
+        Once cancelled() returns True no further jobs are submitted and the
+        ones in flight are waited for.
+        """
+        pending = list(jobs)
+        in_flight = {}
+        used = 0
+        while pending or in_flight:
+            if cancelled is not None and cancelled():
+                pending = []
+                if not in_flight:
+                    break
+            i = 0
+            while i < len(pending) and len(in_flight) < self.workers:
+                job = pending[i]
+                # An oversized job still runs once nothing else is in flight
+                if used + job.memory <= self.available or not in_flight:
+                    in_flight[submit(job)] = job
+                    used += job.memory
+                    pending.pop(i)
+                else:
+                    i += 1
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                used -= in_flight.pop(future).memory
+                on_done(future.result())
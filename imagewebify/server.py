@@ -0,0 +1,359 @@
+"""Local HTTP conversion service backed by a warm pool of worker processes.
+
+    POST /convert?quality=80&max_size=1920&preset=balanced   body: JPG/PNG bytes
+        -> 200 image/webp
+    GET /metrics
+        -> 200 application/json with counters and latency percentiles
+
+The server only ever binds to the loopback interface.
+"""
+import io
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from PIL import Image
+
+from .engine import (
+    DEFAULT_MAX_SIZE,
+    DEFAULT_PRESET,
+    DEFAULT_QUALITY,
+    DEFAULT_RESIZE_MODE,
+    ENCODER_PRESETS,
+    RESIZE_MODES,
+    ConversionSettings,
+    convert_bytes,
+    default_workers,
+)
+
+HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Requests allowed to wait for a worker beyond the ones being converted
+QUEUE_PER_WORKER = 4
+DEFAULT_MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Largest max_size a request may ask for: WebP images cannot be wider or
+# taller than this, and larger values would let a caller make a worker
+# upscale and allocate gigabytes
+MAX_SIZE_LIMIT = 16383
+# Request and response bodies are moved in chunks of this size
+STREAM_CHUNK = 64 * 1024
+# Latencies kept for the percentiles in /metrics
+LATENCY_WINDOW = 10000
+PERCENTILES = (50, 90, 99)
+# Seconds a rejected client is asked to wait before retrying
+RETRY_AFTER = 1
+
+
+def warm_worker():
+    """Load Pillow's plugins and the WebP encoder before the first request"""
+    Image.init()
+    Image.new('RGB', (16, 16)).save(io.BytesIO(), 'WebP')
+    return True
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class LatencyStats:
+    """Request counters plus a sliding window of latencies in seconds"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._total = deque(maxlen=window)
+        self._convert = deque(maxlen=window)
+        self.counts = {'ok': 0, 'bad_request': 0, 'failed': 0, 'rejected': 0, 'worker_lost': 0}
+
+    def count(self, outcome):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def record(self, total_seconds, convert_seconds):
+        with self._lock:
+            self.counts['ok'] += 1
+            self._total.append(total_seconds)
+            self._convert.append(convert_seconds)
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+            total = sorted(self._total)
+            convert = sorted(self._convert)
+
+        def summary(values):
+            result = {f"p{pct}": percentile(values, pct) for pct in PERCENTILES}
+            result['max'] = values[-1] if values else None
+            return {key: round(value * 1000, 3) if value is not None else None
+                    for key, value in result.items()}
+
+        return {
+            'requests': counts,
+            'latency_ms': summary(total),
+            'convert_ms': summary(convert),
+            'window': len(total),
+        }
+
+
+class ConversionServer(ThreadingHTTPServer):
+    """HTTP server converting request bodies to WebP in a process pool.
+
+    At most workers + queue_size conversions are admitted at once; further
+    requests get 503 with Retry-After straight away instead of piling up.
+    A worker that dies (out of memory, killed) breaks the whole pool, so it
+    is replaced by a freshly warmed one.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=DEFAULT_PORT, workers=None, queue_size=None,
+                 max_request_bytes=DEFAULT_MAX_REQUEST_BYTES):
+        self.workers = workers or default_workers()
+        self.queue_size = self.workers * QUEUE_PER_WORKER if queue_size is None else queue_size
+        self.max_request_bytes = max_request_bytes
+        self.stats = LatencyStats()
+        self.started = time.time()
+        self._admitted = 0
+        self._admit_lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        self.pool_restarts = 0
+        self.pool = self._start_pool()
+        super().__init__((HOST, port), ConversionHandler)
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker)
+        # Fork every worker now so the first requests do not pay for it
+        for future in [pool.submit(warm_worker) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def convert(self, data, settings):
+        """Convert data in the pool; raises BrokenProcessPool if a worker died"""
+        pool = self.pool
+        try:
+            return pool.submit(convert_bytes, data, settings).result()
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            raise
+
+    def _replace_pool(self, broken):
+        with self._pool_lock:
+            # Every request that was running on the broken pool gets here;
+            # only the first one replaces it
+            if self.pool is not broken:
+                return
+            self.pool = self._start_pool()
+            self.pool_restarts += 1
+        broken.shutdown(wait=False)
+
+    def admit(self):
+        with self._admit_lock:
+            if self._admitted >= self.workers + self.queue_size:
+                return False
+            self._admitted += 1
+            return True
+
+    def release(self):
+        with self._admit_lock:
+            self._admitted -= 1
+
+    def metrics(self):
+        data = self.stats.snapshot()
+        with self._admit_lock:
+            admitted = self._admitted
+        data.update({
+            'uptime_s': round(time.time() - self.started, 3),
+            'workers': self.workers,
+            'queue_limit': self.queue_size,
+            'pool_restarts': self.pool_restarts,
+            'in_flight': min(admitted, self.workers),
+            'queued': max(0, admitted - self.workers),
+        })
+        return data
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def length_value(text, base, name):
+    """Parse a body length from the request; raises ValueError"""
+    try:
+        value = int(text, base)
+    except ValueError:
+        raise ValueError(f"malformed {name}") from None
+    if value < 0:
+        raise ValueError(f"malformed {name}")
+    return value
+
+
+def int_param(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number") from None
+
+
+def settings_from_query(query):
+    """Build ConversionSettings from query parameters; raises ValueError"""
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    quality = int_param(params, 'quality', DEFAULT_QUALITY)
+    max_size = int_param(params, 'max_size', DEFAULT_MAX_SIZE)
+    preset = params.get('preset', DEFAULT_PRESET)
+    resize_mode = params.get('resize_mode', DEFAULT_RESIZE_MODE)
+    if not 1 <= quality <= 100:
+        raise ValueError("quality must be between 1 and 100")
+    if not 1 <= max_size <= MAX_SIZE_LIMIT:
+        raise ValueError(f"max_size must be between 1 and {MAX_SIZE_LIMIT} pixels")
+    if preset not in ENCODER_PRESETS:
+        raise ValueError(f"preset must be one of {', '.join(ENCODER_PRESETS)}")
+    if resize_mode not in RESIZE_MODES:
+        raise ValueError(f"resize_mode must be one of {', '.join(RESIZE_MODES)}")
+    return ConversionSettings(quality=quality, max_size=max_size, preset=preset, resize_mode=resize_mode)
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ImageWebify'
+
+    def log_message(self, format, *args):
+        pass  # Per-request logging would dominate small conversions
+
+    def send_body(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        view = memoryview(body)
+        for start in range(0, len(view), STREAM_CHUNK):
+            self.wfile.write(view[start:start + STREAM_CHUNK])
+
+    def send_text(self, status, text, headers=None):
+        self.send_body(status, 'text/plain; charset=utf-8', (text + "\n").encode('utf-8'), headers)
+
+    def read_body(self):
+        """Read a Content-Length or chunked request body in STREAM_CHUNK pieces.
+
+        Raises BodyTooLarge past max_request_bytes and ValueError for a
+        malformed chunk size or Content-Length.
+        """
+        limit = self.server.max_request_bytes
+        body = bytearray()
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                size = length_value(self.rfile.readline().split(b';')[0].strip(), 16, "chunk size")
+                if size == 0:
+                    # Skip optional trailers up to the blank line
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return body
+                if len(body) + size > limit:
+                    raise BodyTooLarge()
+                self.read_exactly(body, size)
+                self.rfile.readline()
+        length = length_value(self.headers.get('Content-Length', '0'), 10, "Content-Length")
+        if length > limit:
+            raise BodyTooLarge()
+        self.read_exactly(body, length)
+        return body
+
+    def read_exactly(self, body, size):
+        while size:
+            chunk = self.rfile.read(min(size, STREAM_CHUNK))
+            if not chunk:
+                raise ConnectionError("client closed the connection mid-body")
+            body += chunk
+            size -= len(chunk)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/metrics':
+            body = json.dumps(self.server.metrics(), indent=2).encode('utf-8')
+            self.send_body(200, 'application/json', body)
+        else:
+            self.send_text(404, "not found")
+
+    def do_POST(self):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self.close_connection = True
+            self.send_text(404, "not found")
+            return
+        try:
+            settings = settings_from_query(url.query)
+        except ValueError as e:
+            self.close_connection = True
+            self.server.stats.count('bad_request')
+            self.send_text(400, str(e))
+            return
+        if not self.server.admit():
+            # Reading the body is cheap next to converting it, and lets the
+            # client see the 503 instead of a reset, on a reusable connection
+            try:
+                self.read_body()
+            except (BodyTooLarge, ValueError):
+                self.close_connection = True
+            self.server.stats.count('rejected')
+            self.send_text(503, "conversion queue is full", {'Retry-After': str(RETRY_AFTER)})
+            return
+        try:
+            try:
+                body = self.read_body()
+            except BodyTooLarge:
+                self.close_connection = True
+                self.server.stats.count('bad_request')
+                self.send_text(413, f"request body exceeds {self.server.max_request_bytes} bytes")
+                return
+            except ValueError as e:
+                # The rest of the body cannot be told apart from the next request
+                self.close_connection = True
+                self.server.stats.count('bad_request')
+                self.send_text(400, str(e))
+                return
+            try:
+                webp, result = self.server.convert(bytes(body), settings)
+            except BrokenProcessPool:
+                self.server.stats.count('worker_lost')
+                self.send_text(503, "a conversion worker died, please retry",
+                               {'Retry-After': str(RETRY_AFTER)})
+                return
+        finally:
+            self.server.release()
+
+        if not result.ok:
+            self.server.stats.count('failed')
+            self.send_text(422, f"conversion failed: {result.error}")
+            return
+        headers = {
+            'X-Input-Bytes': str(result.input_bytes),
+            'X-Convert-Seconds': f"{result.seconds:.6f}",
+            'X-Lossless': '1' if result.lossless else '0',
+        }
+        self.send_body(200, 'image/webp', webp, headers)
+        self.server.stats.record(time.perf_counter() - started, result.seconds)
+
+
+def serve(port=DEFAULT_PORT, workers=None, queue_size=None, ready=None):
+    """Run a ConversionServer on localhost until interrupted"""
+    server = ConversionServer(port, workers, queue_size)
+    if ready:
+        ready(server)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,49 @@
+"""srcset manifests for responsive (multi-width) output"""
+import html
+import json
+import os
+
+SRCSET_JSON = "srcset.json"
+SRCSET_HTML = "srcset.html"
+DEFAULT_SIZES = "100vw"
+
+
+def srcset_entry(result, output_dir):
+    """Describe one responsive ConversionResult with paths relative to output_dir"""
+    outputs = sorted(result.outputs)
+    return {
+        "src": os.path.relpath(outputs[-1][1], output_dir),
+        "srcset": ", ".join(f"{os.path.relpath(path, output_dir)} {width}w" for width, path, _ in outputs),
+        "files": [{"width": width, "path": os.path.relpath(path, output_dir), "bytes": size}
+                  for width, path, size in outputs],
+    }
+
+
+def output_stem(result):
+    """The stem the outputs of result were named with, which is unique in
+    the batch even when several sources share a file name"""
+    width, path, _ = result.outputs[0]
+    return os.path.basename(path)[:-len(f"-{width}w.webp")]
+
+
+def img_tag(name, entry, sizes=DEFAULT_SIZES):
+    return (f'<img src="{html.escape(entry["src"])}" srcset="{html.escape(entry["srcset"])}" '
+            f'sizes="{html.escape(sizes)}" alt="{html.escape(name)}">')
+
+
+def write_srcset_manifest(results, output_dir, sizes=DEFAULT_SIZES):
+    """Write srcset.json and srcset.html for the responsive results; return their paths"""
+    entries = {}
+    for result in results:
+        if result.ok and result.outputs:
+            entries[output_stem(result)] = srcset_entry(result, output_dir)
+
+    json_path = os.path.join(output_dir, SRCSET_JSON)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=2)
+
+    html_path = os.path.join(output_dir, SRCSET_HTML)
+    with open(html_path, 'w', encoding='utf-8') as f:
+        for name, entry in sorted(entries.items()):
+            f.write(img_tag(name, entry, sizes) + "\n")
+    return json_path, html_path
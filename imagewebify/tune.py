@@ -0,0 +1,148 @@
+"""Per-image WebP quality search for a byte budget or a minimum SSIM/PSNR"""
+import io
+import math
+import time
+from dataclasses import replace
+
+from PIL import Image, ImageChops, ImageMath, ImageStat
+
+MIN_QUALITY = 1
+MAX_QUALITY = 100
+
+# SSIM is computed over non-overlapping windows of this many pixels square
+SSIM_WINDOW = 8
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+
+def image_math(fn, **images):
+    """Evaluate fn(**operands) with ImageMath on any supported Pillow version"""
+    if hasattr(ImageMath, 'lambda_eval'):
+        return ImageMath.lambda_eval(lambda args: fn(**{name: args[name] for name in images}), **images)
+    call = "fn(" + ", ".join(f"{name}={name}" for name in images) + ")"
+    return ImageMath.eval(call, fn=fn, **images)
+
+
+def psnr(reference, candidate):
+    """Peak signal-to-noise ratio in dB between two same-sized RGB images"""
+    rms = ImageStat.Stat(ImageChops.difference(reference, candidate)).rms
+    mse = sum(value * value for value in rms) / len(rms)
+    if mse == 0:
+        return float('inf')
+    return 10 * math.log10(255 * 255 / mse)
+
+
+def ssim(reference, candidate, window=SSIM_WINDOW):
+    """Mean structural similarity of the luma of two same-sized images"""
+    window = max(1, min(window, reference.width, reference.height))
+    x = reference.convert('L').convert('F')
+    y = candidate.convert('L').convert('F')
+    mu_x = x.reduce(window)
+    mu_y = y.reduce(window)
+    xx = image_math(lambda a: a * a, a=x).reduce(window)
+    yy = image_math(lambda a: a * a, a=y).reduce(window)
+    xy = image_math(lambda a, b: a * b, a=x, b=y).reduce(window)
+    ssim_map = image_math(
+        lambda mx, my, sxx, syy, sxy: ((mx * my * 2 + SSIM_C1) * ((sxy - mx * my) * 2 + SSIM_C2))
+        / ((mx * mx + my * my + SSIM_C1) * ((sxx - mx * mx) + (syy - my * my) + SSIM_C2)),
+        mx=mu_x, my=mu_y, sxx=xx, syy=yy, sxy=xy,
+    )
+    return mean_value(ssim_map)
+
+
+def mean_value(img):
+    """Mean of a single band image (ImageStat bins 'F' images, losing precision)"""
+    return img.reduce((img.width, img.height)).getpixel((0, 0))
+
+
+def decode_webp(data):
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        return img.convert('RGB')
+
+
+class QualitySearch:
+    """Binary-searches the WebP quality of one already resized image.
+
+    Every candidate is encoded to memory only. With target_bytes the highest
+    quality that fits is chosen; otherwise the lowest quality that meets
+    min_ssim and min_psnr. Once the deadline (a time.perf_counter() value,
+    by default max_tune_seconds from now) has passed the best candidate
+    found so far wins; at least one candidate is always encoded.
+    """
+
+    def __init__(self, img, settings, encode, deadline=None):
+        self.img = img
+        self.settings = settings
+        self.encode = encode
+        self.deadline = tune_deadline(settings) if deadline is None else deadline
+        self.iterations = 0
+        self._encoded = {}
+        self._reference = None
+
+    def encoded(self, quality):
+        if quality not in self._encoded:
+            self._encoded[quality] = self.encode(self.img, replace(self.settings, quality=quality))
+            self.iterations += 1
+        return self._encoded[quality]
+
+    def meets_metrics(self, data):
+        if self._reference is None:
+            self._reference = self.img.convert('RGB')
+        candidate = decode_webp(data)
+        if self.settings.min_ssim and ssim(self._reference, candidate) < self.settings.min_ssim:
+            return False
+        if self.settings.min_psnr and psnr(self._reference, candidate) < self.settings.min_psnr:
+            return False
+        return True
+
+    def run(self):
+        """Return (quality, webp_bytes) of the chosen candidate"""
+        by_size = bool(self.settings.target_bytes)
+        low, high = MIN_QUALITY, MAX_QUALITY
+        best = None
+        while low <= high:
+            quality = (low + high) // 2
+            data = self.encoded(quality)
+            if by_size:
+                ok = len(data) <= self.settings.target_bytes
+            else:
+                ok = self.meets_metrics(data)
+            if ok:
+                best = quality
+            # Larger files come from higher qualities: search upwards for
+            # a byte budget, downwards for a quality floor
+            if ok == by_size:
+                low = quality + 1
+            else:
+                high = quality - 1
+            if time.perf_counter() >= self.deadline:
+                break
+
+        if best is None:
+            # Nothing met the target: fall back to the closest candidate tried
+            best = min(self._encoded) if by_size else max(self._encoded)
+        return best, self._encoded[best]
+
+
+def parse_size(text):
+    """Parse a byte count such as '150000', '150KB', '1.5MB' or '4GB'"""
+    value = text.strip().upper().replace(' ', '')
+    for suffix, factor in (('KB', 1024), ('MB', 1024 ** 2), ('GB', 1024 ** 3),
+                           ('K', 1024), ('M', 1024 ** 2), ('G', 1024 ** 3), ('B', 1)):
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * factor)
+    return int(value)
+
+
+def tune_deadline(settings):
+    """The time.perf_counter() value by which quality searches starting now must end.
+
+    One deadline covers every search for a file, so responsive output with
+    several widths shares max_tune_seconds instead of getting it per width.
+    """
+    return time.perf_counter() + settings.max_tune_seconds
+
+
+def tuning_enabled(settings):
+    return bool(settings.target_bytes or settings.min_ssim or settings.min_psnr)
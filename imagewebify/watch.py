@@ -0,0 +1,321 @@
+"""Watch-folder mode: convert images continuously as they land in a folder"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .dedup import suffixed_stem, unique_stems
+from .engine import ConversionResult, ConversionSettings, convert_file, default_workers, is_supported
+
+# How often the polling backend rescans the folder, in seconds
+POLL_INTERVAL = 0.2
+# A file must keep the same size and mtime this long before it is read
+SETTLE_TIME = 0.3
+# Ready files waiting for a worker, per worker; the watcher blocks when full
+QUEUE_PER_WORKER = 4
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def list_images(folder):
+    """Return the paths of the supported image files directly in folder"""
+    paths = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                if is_supported(entry.name) and entry.is_file():
+                    paths.append(entry.path)
+            except OSError:
+                continue
+    return paths
+
+
+class StabilityTracker:
+    """Holds back files until they have stopped growing"""
+
+    def __init__(self, settle=SETTLE_TIME):
+        self.settle = settle
+        self._pending = {}
+
+    def touch(self, path):
+        self._pending.setdefault(path, None)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def ready(self):
+        """Return the pending files whose size and mtime stayed unchanged for settle seconds"""
+        now = time.monotonic()
+        ready = []
+        for path, seen in list(self._pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            state = (stat.st_size, stat.st_mtime_ns)
+            if seen is None or seen[0] != state:
+                self._pending[path] = (state, now)
+            elif now - seen[1] >= self.settle:
+                del self._pending[path]
+                ready.append((path, state))
+        return ready
+
+
+class PollingBackend:
+    """Detects new and changed files by rescanning the folder with os.scandir"""
+
+    def __init__(self, folder, interval=POLL_INTERVAL):
+        self.folder = folder
+        self.interval = interval
+        self._known = {}
+
+    def prime(self):
+        """Record the files already present so they are not reported as changes"""
+        self.changes(0)
+
+    def changes(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        changed = []
+        known = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not is_supported(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                state = (stat.st_size, stat.st_mtime_ns)
+                known[entry.path] = state
+                if self._known.get(entry.path) != state:
+                    changed.append((entry.path, False))
+        self._known = known
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """Receives file events from the Linux kernel via inotify.
+
+    Files still being written are reported by IN_CREATE and left to the
+    stability tracker; IN_MODIFY is not watched, since it fires on every
+    write() and would flood the kernel queue during large uploads.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(folder), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"inotify_add_watch failed for {folder}")
+
+    def changes(self, timeout):
+        """Return [(path, closed)] where closed means the writer has finished"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changed = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            name = os.fsdecode(name)
+            if mask & IN_Q_OVERFLOW:
+                # The kernel queue overflowed and events were dropped: report
+                # every image as possibly changed. Files converted already are
+                # not queued again while their size and mtime are unchanged.
+                changed.extend((path, False) for path in list_images(self.folder))
+            elif name and is_supported(name):
+                closed = bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO))
+                changed.append((os.path.join(self.folder, name), closed))
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def open_backend(folder, use_inotify=True, poll_interval=POLL_INTERVAL):
+    """Return an inotify backend where available, otherwise a polling one"""
+    if use_inotify and sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend(folder)
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend(folder, poll_interval)
+
+
+class FolderWatcher:
+    """Converts JPG/PNG files to WebP as they are written into a folder.
+
+    Files that have settled are put on a bounded queue served by one feeder
+    thread per worker process. When every worker is busy and the queue is
+    full, the watcher blocks, so a burst of arrivals cannot grow memory
+    without bound. A worker process that dies breaks the pool, which is then
+    replaced; the file it was converting is reported as failed.
+
+    Sources sharing a stem (a.jpg and a.png) get distinct output names: the
+    files present at startup are named as a batch would name them, and a
+    later arrival whose stem is taken gets a path hash appended.
+    """
+
+    def __init__(self, folder, output_dir, settings=None, workers=None, queue_size=None,
+                 settle=SETTLE_TIME, use_inotify=True, poll_interval=POLL_INTERVAL,
+                 process_existing=True, on_result=None):
+        self.folder = folder
+        self.output_dir = output_dir
+        self.settings = settings or ConversionSettings()
+        self.workers = workers or default_workers()
+        self.queue = queue.Queue(maxsize=queue_size or self.workers * QUEUE_PER_WORKER)
+        self.tracker = StabilityTracker(settle)
+        self.backend = open_backend(folder, use_inotify, poll_interval)
+        self.process_existing = process_existing
+        self.on_result = on_result
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._pool = None
+        # (size, mtime_ns) of each file when it was last queued, so events
+        # for an unchanged file do not convert it twice
+        self._queued = {}
+        # Output stem of every source seen, and the source owning each stem
+        self._stems = {}
+        self._owners = {}
+
+    @property
+    def backend_name(self):
+        return 'inotify' if isinstance(self.backend, InotifyBackend) else 'polling'
+
+    def stop(self):
+        self._stop.set()
+
+    def _enqueue(self, path, state):
+        with self._lock:
+            if self._queued.get(path) == state:
+                return
+            self._queued[path] = state
+        while not self._stop.is_set():
+            try:
+                self.queue.put(path, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _claim_existing(self, paths):
+        for path, stem in unique_stems(paths).items():
+            self._stems[path] = stem
+            self._owners.setdefault(stem.lower(), path)
+
+    def _stem(self, path):
+        with self._lock:
+            stem = self._stems.get(path)
+            if stem is None:
+                stem = Path(path).stem
+                if self._owners.setdefault(stem.lower(), path) != path:
+                    stem = suffixed_stem(stem, os.path.abspath(path))
+                self._stems[path] = stem
+            return stem
+
+    def _scan_existing(self, paths):
+        for path in paths:
+            self.tracker.touch(path)
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Start the worker processes now rather than on the first arrival
+        for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def _convert(self, path):
+        # A file may only have been queued on a pool broken by another one,
+        # so it gets a second try; one that kills its worker twice fails
+        for _ in range(2):
+            pool = self._pool
+            try:
+                return pool.submit(convert_file, path, self.output_dir, self.settings,
+                                   self._stem(path)).result()
+            except BrokenProcessPool:
+                with self._lock:
+                    # Only the first feeder to notice replaces the pool
+                    if self._pool is pool:
+                        self._pool = self._start_pool()
+                        pool.shutdown(wait=False)
+            except Exception as e:
+                return ConversionResult(path, error=str(e))
+        return ConversionResult(path, error="the conversion worker process died")
+
+    def _feed(self):
+        while not self._stop.is_set():
+            try:
+                path = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            result = self._convert(path)
+            if self.on_result:
+                self.on_result(result)
+
+    def run(self):
+        """Watch until stop() is called or the process is interrupted"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        existing = list_images(self.folder)
+        self._claim_existing(existing)
+        if self.process_existing:
+            self._scan_existing(existing)
+        elif isinstance(self.backend, PollingBackend):
+            self.backend.prime()
+
+        self._pool = self._start_pool()
+        feeders = [threading.Thread(target=self._feed, daemon=True) for _ in range(self.workers)]
+        for feeder in feeders:
+            feeder.start()
+        try:
+            while not self._stop.is_set():
+                # Wake up quickly while files are settling
+                timeout = self.tracker.settle / 2 if len(self.tracker) else 0.5
+                for path, closed in self.backend.changes(timeout):
+                    if closed:
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        self._enqueue(path, (stat.st_size, stat.st_mtime_ns))
+                    else:
+                        self.tracker.touch(path)
+                for path, state in self.tracker.ready():
+                    self._enqueue(path, state)
+        finally:
+            self._stop.set()
+            for feeder in feeders:
+                feeder.join()
+            self.backend.close()
+            self._pool.shutdown(wait=True)